@@ -1,17 +1,17 @@
 # Generate single Concept Data
 import os, random, pandas as pd
-random.seed(42)
+from collections import defaultdict
+from sampling import DistractorSampler
+from tables import read_table
+from writers import write_rows
+SEED = 42
 
 # Directory
 BASE_DIR = os.path.join("..", "geodata", "results")       
 REL_DIR = os.path.join("..", "geodata", "relations")     
-YESNO_DIR = os.path.join(BASE_DIR, "binary")
-MCQ_DIR = os.path.join(BASE_DIR, "mcqs")
-
-os.makedirs(YESNO_DIR, exist_ok=True)
-os.makedirs(MCQ_DIR, exist_ok=True)
 
 YESNO_FILE, MCQ_FILE = "atomic_yesno.csv", "atomic_mcq.csv"
+OUTPUTS = {"yesno": os.path.join("binary", YESNO_FILE), "mcq": os.path.join("mcqs", MCQ_FILE)}
 
 # Token definitions
 DIR_TOKENS = ["north", "south", "east", "west"]
@@ -22,8 +22,10 @@ DIRECTION_OPPOSITES = {"north": "south", "south": "north", "east": "west", "west
 DISTANCE_OPPOSITES = {"near": "far", "far": "near", "close": "distant", "distant": "close"}
 TOPOLOGY_OPPOSITES = {"within": "borders", "borders": "within"}
 
-def load_csv(name, tokens):
-    df = pd.read_csv(f"{REL_DIR}/{name}")
+def load_data(rel_dir=REL_DIR):
+    return {f: read_table(os.path.join(rel_dir, f"{f}.csv")) for f in ("dir", "dis", "top")}
+
+def select_tokens(df, tokens):
     return df[df["relation"].isin(tokens)]
 
 def balance_dataset(df, token_col, group_size):
@@ -43,9 +45,6 @@ def process_topology(df, within_target, borders_target):
     ])
 
 # Question generators
-def get_random_distractor(correct, all_places):
-    return random.choice([p for p in all_places if p != correct])
-
 def generate_yes(p1, p2, rel):
     if rel in DIRECTION_OPPOSITES:
         return [(f"Is {p1} {rel} of {p2}?", "Yes", "no_change")]
@@ -71,25 +70,47 @@ def generate_no(p1, p2, rel):
         return [(f"Is {p1} within {p2}?", "No", "replace_top_token")]
     return []
 
+# Hard-negative index, built once per relation table
+def build_negative_index(df):
+    # (relation, place2) -> place1 list in row order, and the positions of
+    # each place1 inside its group so it can be skipped without a rebuild
+    groups, positions = defaultdict(list), defaultdict(list)
+    for p1, rel, p2 in zip(df["place1"], df["relation"], df["place2"]):
+        group = groups[(rel, p2)]
+        positions[(rel, p2, p1)].append(len(group))
+        group.append(p1)
+    return groups, positions
+
+def draw_hard_negative(index, rel, p2, exclude):
+    # Same draw (and RNG consumption) as
+    # random.choice([p for p in group if p != exclude]); None if nothing left
+    groups, positions = index
+    group = groups.get((rel, p2), [])
+    skip = positions.get((rel, p2, exclude), [])
+    n = len(group) - len(skip)
+    if n == 0:
+        return None
+    k = random.randrange(n)
+    for pos in skip:
+        if pos > k:
+            break
+        k += 1
+    return group[k]
+
 # MCQ generation
 def generate_mcq(dir_df, dis_df, top_df, all_places):
-    rows = []
+    sampler = DistractorSampler(all_places)
 
     # Direction and Distance
     for df, rel_type in [(dir_df, "direction"), (dis_df, "distance")]:
-        for _, row in df.iterrows():
-            p1, rel, p2 = row["place1"], row["relation"], row["place2"]
+        index = build_negative_index(df)
+        for p1, rel, p2 in zip(df["place1"], df["relation"], df["place2"]):
             q = f"Which city is located in {rel} of {p2}?" if rel_type == "direction" else f"Which city is {rel} to {p2}?"
 
-            rel_df = dir_df if rel_type == "direction" else dis_df
-            hard_negatives = rel_df[
-                (rel_df["relation"] == rel) &
-                (rel_df["place2"] == p2) &
-                (rel_df["place1"] != p1)
-            ]["place1"].tolist()
-
-            hard_neg = random.choice(hard_negatives) if hard_negatives else get_random_distractor(p1, all_places)
-            rand_neg = get_random_distractor(p1, all_places)
+            hard_neg = draw_hard_negative(index, rel, p2, p1)
+            if hard_neg is None:
+                hard_neg = sampler.draw(p1)
+            rand_neg = sampler.draw(p1)
 
             opts = [p1, hard_neg, rand_neg]
             sources = ["correct", "hard", "random"]
@@ -98,22 +119,23 @@ def generate_mcq(dir_df, dis_df, top_df, all_places):
             opts, sources = zip(*combined)
 
             ans = ["A", "B", "C"][opts.index(p1)]
-            rows.append([
+            yield [
                 p1, rel, p2, f"{p1} is {rel} {p2}",
                 q, "\n".join(f"{l}. {o}" for l, o in zip("ABC", opts)),
                 f"{ans}. {p1}", ",".join(sources)
-            ])
-
-    # Topology
-    for _, row in top_df.iterrows():
-        p1, rel, p2 = row["place1"], row["relation"], row["place2"]
+            ]
+
+    # Topology: place1 lists per relation and for every other relation
+    same_places = {rel: top_df.loc[top_df["relation"] == rel, "place1"].tolist()
+                   for rel in top_df["relation"].unique()}
+    opp_places = {rel: top_df.loc[top_df["relation"] != rel, "place1"].tolist()
+                  for rel in top_df["relation"].unique()}
+    for p1, rel, p2 in zip(top_df["place1"], top_df["relation"], top_df["place2"]):
         q = f"Which city is within {p2}?" if rel == "within" else f"Which city borders {p2}?"
 
-        same_df = top_df[top_df["relation"] == rel]
-        opp_df = top_df[top_df["relation"] != rel]
-
-        hard_neg = random.choice(same_df["place1"].tolist()) if not same_df.empty else get_random_distractor(p1, all_places)
-        opp_neg = random.choice(opp_df["place1"].tolist()) if not opp_df.empty else get_random_distractor(p1, all_places)
+        same, opp = same_places[rel], opp_places[rel]
+        hard_neg = random.choice(same) if same else sampler.draw(p1)
+        opp_neg = random.choice(opp) if opp else sampler.draw(p1)
 
         opts = [p1, hard_neg, opp_neg]
         sources = ["correct", "hard", "random"]
@@ -122,43 +144,43 @@ def generate_mcq(dir_df, dis_df, top_df, all_places):
         opts, sources = zip(*combined)
 
         ans = ["A", "B", "C"][opts.index(p1)]
-        rows.append([
+        yield [
             p1, rel, p2, f"{p1} is {rel} {p2}",
             q, "\n".join(f"{l}. {o}" for l, o in zip("ABC", opts)),
             f"{ans}. {p1}", ",".join(sources)
-        ])
-
-    return rows
-
-# Data loading
-dir_df = balance_dataset(load_csv("dir.csv", DIR_TOKENS), "relation", 500)
-dis_df = balance_dataset(load_csv("dis.csv", DIS_TOKENS), "relation", 500)
-top_df = process_topology(load_csv("top.csv", TOP_TOKENS), 500, 500)
-
-all_places = sorted(set(pd.concat([
-    dir_df["place1"], dir_df["place2"],
-    dis_df["place1"], dis_df["place2"],
-    top_df["place1"], top_df["place2"]
-]).unique()))
-
-# Build Yes/No dataset
-yesno_data = []
-for df in [dir_df, dis_df, top_df]:
-    for _, row in df.iterrows():
-        yesno_data.extend([[row["place1"], row["relation"], row["place2"], q, a, t]
-            for q, a, t in generate_yes(row["place1"], row["place2"], row["relation"])])
-        yesno_data.extend([[row["place1"], row["relation"], row["place2"], q, a, t]
-            for q, a, t in generate_no(row["place1"], row["place2"], row["relation"])])
-
-# Build MCQ dataset
-mcq_data = generate_mcq(dir_df, dis_df, top_df, all_places)
+        ]
+
+# frames: {"dir": df, "dis": df, "top": df} as read from the relation CSVs.
+# Yields ("yesno", row) for every relation row, then ("mcq", row).
+def generate(frames, seed=SEED):
+    random.seed(seed)
+    dir_df = balance_dataset(select_tokens(frames["dir"], DIR_TOKENS), "relation", 500)
+    dis_df = balance_dataset(select_tokens(frames["dis"], DIS_TOKENS), "relation", 500)
+    top_df = process_topology(select_tokens(frames["top"], TOP_TOKENS), 500, 500)
+
+    all_places = sorted(set(pd.concat([
+        dir_df["place1"], dir_df["place2"],
+        dis_df["place1"], dis_df["place2"],
+        top_df["place1"], top_df["place2"]
+    ]).unique()))
+
+    # Yes/No dataset
+    for df in [dir_df, dis_df, top_df]:
+        for p1, rel, p2 in zip(df["place1"], df["relation"], df["place2"]):
+            for q, a, t in generate_yes(p1, p2, rel) + generate_no(p1, p2, rel):
+                yield "yesno", [p1, rel, p2, q, a, t]
+
+    # MCQ dataset
+    for row in generate_mcq(dir_df, dis_df, top_df, all_places):
+        yield "mcq", row
 
 # outputs
-pd.DataFrame(
-    yesno_data,
-    columns=["place1", "relation", "place2", "question", "answer", "transition"]
-).to_csv(f"{YESNO_DIR}/{YESNO_FILE}", index=False)
-pd.DataFrame(
-    mcq_data,
-    columns=["place1", "relation", "place2", "triplet", "question", "options", "answer", "option_sources"]
-).to_csv(f"{MCQ_DIR}/{MCQ_FILE}", index=False)
\ No newline at end of file
+def write(rows, base_dir=BASE_DIR):
+    return write_rows(rows, {
+        "yesno": (os.path.join(base_dir, OUTPUTS["yesno"]),
+                  ["place1", "relation", "place2", "question", "answer", "transition"]),
+        "mcq": (os.path.join(base_dir, OUTPUTS["mcq"]),
+                ["place1", "relation", "place2", "triplet", "question", "options", "answer", "option_sources"])})
+
+if __name__ == "__main__":
+    write(generate(load_data()))
\ No newline at end of file
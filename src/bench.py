@@ -0,0 +1,392 @@
+"""
+Benchmark the extraction and generation stages on synthetic data.
+Wards are a grid of ward-sized boxes around the metropolitan extent, `scale`
+times the ~800 real wards, grouped into 5x5-ward districts inside one region;
+no GraphDB is needed. The extraction stages run the real kernels on these
+geometries; the generation stages and the merge run on relation tables
+synthesized from them, with `degree` partners per ward for dir/dis. Every
+stage runs in a fresh process, so its peak RSS is its own. Stages whose pair
+count exceeds `max_pairs` are recorded as skipped rather than run out of
+memory. Results are saved as JSON; --compare reports the change against an
+earlier results file.
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import shapely
+
+import atomicconcept
+import benchmarkmerge
+import compositional
+import run_all_concepts
+from dirtoken import direction_kernel
+from distoken import candidate_pairs, distance_tokens, pair_distances
+from geometry import max_overstatement, mean_latitude, to_metres
+from incremental import Delta
+from tables import find_table, write_table
+from toptoken import LOCAL_RELATIONS, predicate_pairs
+
+BENCH_DIR = os.path.join("..", "geodata", "bench")
+BASE_WARDS = 800
+SCALES = [1, 10, 100]
+SEED = 42
+# Partners per ward in the synthetic dir/dis tables
+DEGREE = 100
+MAX_PAIRS = 15_000_000
+CELL_KM = 2.8
+ORIGIN = (-2.5, 53.0)
+DISTRICT_CELLS = 5
+# Mean number of wards within the "close" band (25 km) of a ward
+CLOSE_NEIGHBOURS = math.pi * (25 / CELL_KM) ** 2
+STAGES = ["synth", "dir_extract", "dis_extract", "dis_extract_close", "top_extract",
+          "load", "atomic", "dis_dir", "dir_top", "top_dis", "3_concept", "merge"]
+# A stage is flagged when its time grows faster than scale ** SUPERLINEAR
+SUPERLINEAR = 1.5
+REGRESSION = 1.25
+
+def ward_count(scale):
+    return round(BASE_WARDS * scale)
+
+def synth_wards(scale):
+    # (names, ward boxes, {class: (names, geoms)}) for the within targets
+    n = ward_count(scale)
+    side = math.ceil(math.sqrt(n))
+    dlat = CELL_KM / 111.2
+    dlon = dlat / math.cos(math.radians(ORIGIN[1]))
+    row, col = np.divmod(np.arange(n), side)
+    x, y = ORIGIN[0] + col * dlon, ORIGIN[1] + row * dlat
+    wards = shapely.box(x, y, x + dlon, y + dlat)
+    rows = math.ceil(n / side)
+    dr, dc = np.divmod(np.arange(math.ceil(rows / DISTRICT_CELLS) * math.ceil(side / DISTRICT_CELLS)),
+                       math.ceil(side / DISTRICT_CELLS))
+    size = DISTRICT_CELLS
+    districts = shapely.box(ORIGIN[0] + dc * size * dlon, ORIGIN[1] + dr * size * dlat,
+                            ORIGIN[0] + (dc + 1) * size * dlon, ORIGIN[1] + (dr + 1) * size * dlat)
+    region = shapely.box(ORIGIN[0] - dlon, ORIGIN[1] - dlat,
+                         ORIGIN[0] + (side + 1) * dlon, ORIGIN[1] + (rows + 1) * dlat)
+    names = np.array([f"Ward {k}" for k in range(n)], dtype=object)
+    targets = {
+        "OS_MetropolitanDistrict": (np.array([f"District {k}" for k in range(len(districts))], dtype=object),
+                                    districts),
+        "OS_EuropeanRegion": (np.array(["Region 0"], dtype=object), np.array([region]))}
+    return names, wards, targets
+
+def sample_pairs(n, degree, rng):
+    # Distinct ordered ward pairs, about `degree` per ward: three quarters at
+    # log-uniform grid distances up to 40 cells, so every distance band
+    # occurs, the rest uniform over all wards
+    side = math.ceil(math.sqrt(n))
+    local = degree * 3 // 4
+    i_local = np.repeat(np.arange(n), local)
+    radius = np.exp(rng.uniform(0, np.log(40), len(i_local)))
+    angle = rng.uniform(0, 2 * np.pi, len(i_local))
+    row, col = np.divmod(i_local, side)
+    row = np.clip(np.rint(row + radius * np.sin(angle)), 0, (n - 1) // side).astype(np.int64)
+    col = np.clip(np.rint(col + radius * np.cos(angle)), 0, side - 1).astype(np.int64)
+    j_local = np.minimum(row * side + col, n - 1)
+    i_global = np.repeat(np.arange(n), degree - local)
+    i = np.concatenate([i_local, i_global])
+    j = np.concatenate([j_local, rng.integers(0, n, len(i_global))])
+    keep = i != j
+    pair_ids = np.unique(i[keep] * n + j[keep])
+    return pair_ids // n, pair_ids % n
+
+def topology_frame(names, wards, targets):
+    # top.csv rows as toptoken.extract_local builds them in a full run
+    frames = []
+    for cls, predicate, ordered in LOCAL_RELATIONS:
+        other_names, other_geoms = (names, wards) if cls == "OS_MetropolitanDistrictWard" else targets[cls]
+        i, j = predicate_pairs(wards, other_geoms, predicate)
+        keep = names[i] != other_names[j]
+        if ordered:
+            keep &= names[i].astype(str) < other_names[j].astype(str)
+        frames.append(pd.DataFrame({
+            "place1": names[i[keep]], "place2": other_names[j[keep]],
+            "relation": "borders" if predicate == "touches" else "within"}))
+    return pd.concat(frames, ignore_index=True)
+
+def synth_relations(scale, degree, seed, rel_dir):
+    # Writes dir/dis/top tables for the synthetic wards; returns row counts
+    names, wards, targets = synth_wards(scale)
+    i, j = sample_pairs(len(names), degree, np.random.default_rng(seed))
+    centroids = shapely.centroid(wards)
+    _, _, bearings, relations = direction_kernel(shapely.get_y(centroids), shapely.get_x(centroids), i, j)
+    dir_df = pd.DataFrame({"place1": names[i], "place2": names[j],
+                           "bearing": bearings, "relation": relations})
+    pair_ids = np.unique(np.minimum(i, j) * len(names) + np.maximum(i, j))
+    a, b = pair_ids // len(names), pair_ids % len(names)
+    lat0 = mean_latitude(wards)
+    dist = pair_distances(to_metres(wards, lat0), a, b, lat0)
+    dis_df = pd.DataFrame({"place1": names[a], "place2": names[b],
+                           "relation": distance_tokens(dist), "distance_m": dist})
+    top_df = topology_frame(names, wards, targets)
+    for name, df in [("dir", dir_df), ("dis", dis_df), ("top", top_df)]:
+        write_table(df, os.path.join(rel_dir, f"{name}.csv"))
+    return {"dir_rows": len(dir_df), "dis_rows": len(dis_df), "top_rows": len(top_df)}
+
+def estimated_pairs(stage, scale, degree):
+    n = ward_count(scale)
+    if stage == "dir_extract":
+        return n * (n - 1)
+    if stage == "dis_extract":
+        return n * (n - 1) // 2
+    if stage == "dis_extract_close":
+        return int(n * CLOSE_NEIGHBOURS)
+    if stage == "top_extract":
+        return 8 * n
+    return n * degree
+
+# Each stage is (setup, run): setup(args) -> state is not timed, run(state)
+# returns item counts and is timed with the RSS it adds
+def _geometry_setup(args):
+    names, wards, targets = synth_wards(args.scale)
+    return {"names": names, "wards": wards, "targets": targets}
+
+def _synth(args):
+    return synth_relations(args.scale, args.degree, args.seed, os.path.join(args.work, "relations"))
+
+def _dir_extract(state):
+    centroids = shapely.centroid(state["wards"])
+    i, _, _, _ = direction_kernel(shapely.get_y(centroids), shapely.get_x(centroids))
+    return {"pairs": len(i)}
+
+def _dis_extract(band):
+    def run(state):
+        names = state["names"]
+        delta = Delta(None, names, names, [], {}, {}, full=True)
+        lat0 = mean_latitude(state["wards"])
+        geoms = to_metres(state["wards"], lat0)
+        i, j = candidate_pairs(geoms, band, delta, max_overstatement(state["wards"], lat0))
+        distance_tokens(pair_distances(geoms, i, j, lat0))
+        return {"pairs": len(i)}
+    return run
+
+def _top_extract(state):
+    return {"rows": len(topology_frame(state["names"], state["wards"], state["targets"]))}
+
+def _frames_setup(args):
+    frames = run_all_concepts.load_relations(os.path.join(args.work, "relations"))
+    return {"args": args, "frames": frames, "store": compositional.build_store(frames)}
+
+def _load(state):
+    frames = run_all_concepts.load_relations(os.path.join(state.work, "relations"))
+    compositional.build_store(frames)
+    return {"rows": sum(len(df) for df in frames.values())}
+
+def _generate(name):
+    def run(state):
+        out = os.path.join(state["args"].work, "results")
+        seed = state["args"].seed
+        if name == "atomic":
+            return atomicconcept.write(atomicconcept.generate(state["frames"], seed), out)
+        return compositional.write(name, compositional.generate(state["store"], name, seed), out)
+    return run
+
+def _merge(state):
+    out = os.path.join(state.work, "results")
+    benchmarkmerge.process_mcq(out)
+    benchmarkmerge.process_yesno(out)
+    return {"bytes": sum(os.path.getsize(p) for p in
+                         map(find_output, [os.path.join(out, benchmarkmerge.MCQ_OUTPUT),
+                                           os.path.join(out, benchmarkmerge.YESNO_OUTPUT)]))}
+
+def find_output(path):
+    found = find_table(path)
+    if found is None:
+        raise FileNotFoundError(f"missing output {path}")
+    return found
+
+def _args(args):
+    return args
+
+STAGE_FUNCS = {
+    "synth": (_args, _synth),
+    "dir_extract": (_geometry_setup, _dir_extract),
+    "dis_extract": (_geometry_setup, _dis_extract("far")),
+    "dis_extract_close": (_geometry_setup, _dis_extract("close")),
+    "top_extract": (_geometry_setup, _top_extract),
+    "load": (_args, _load),
+    "atomic": (_frames_setup, _generate("atomic")),
+    "dis_dir": (_frames_setup, _generate("dis_dir")),
+    "dir_top": (_frames_setup, _generate("dir_top")),
+    "top_dis": (_frames_setup, _generate("top_dis")),
+    "3_concept": (_frames_setup, _generate("3_concept")),
+    "merge": (_args, _merge),
+}
+
+def peak_rss_mib():
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / 1024
+
+def run_child(args):
+    # Runs one stage in this process; the record is the last stdout line
+    setup, run = STAGE_FUNCS[args.child]
+    with contextlib.redirect_stdout(sys.stderr):
+        state = setup(args)
+        setup_rss = peak_rss_mib()
+        start = time.perf_counter()
+        counts = run(state)
+        seconds = time.perf_counter() - start
+    print(json.dumps({"seconds": seconds, "peak_rss_mib": peak_rss_mib(),
+                      "setup_rss_mib": setup_rss, "counts": counts}))
+    return 0
+
+def run_stage(stage, scale, args, work):
+    # Record for one (scale, stage), measured in a fresh interpreter
+    record = {"scale": scale, "stage": stage, "wards": ward_count(scale)}
+    pairs = estimated_pairs(stage, scale, args.degree)
+    if pairs > args.max_pairs:
+        record.update(status="skipped", reason=f"{pairs} pairs > --max-pairs {args.max_pairs}")
+        return record
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", stage, "--scale", str(scale),
+           "--work", work, "--seed", str(args.seed), "--degree", str(args.degree)]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    record["wall_seconds"] = time.perf_counter() - start
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        tail = proc.stderr.strip().splitlines()[-1:] or [f"exit code {proc.returncode}"]
+        record.update(status="failed", reason=tail[0])
+        return record
+    record.update(status="ok", **json.loads(lines[-1]))
+    return record
+
+def scaling(runs):
+    # Per stage, the exponent k in time ~ scale ** k between consecutive
+    # measured scales; timings under 50 ms are too noisy to use
+    by_stage = {}
+    for r in runs:
+        if r["status"] == "ok" and r["seconds"] >= 0.05:
+            by_stage.setdefault(r["stage"], []).append((r["scale"], r["seconds"]))
+    result = {}
+    for stage, points in by_stage.items():
+        points.sort()
+        result[stage] = [{"from": a, "to": b, "exponent": math.log(tb / ta) / math.log(b / a)}
+                         for (a, ta), (b, tb) in zip(points, points[1:]) if b > a]
+    return result
+
+def git_label():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "local"
+
+def compare(old, new, tolerance=REGRESSION):
+    # Prints time / RSS ratios for the runs measured in both; returns the
+    # (scale, stage) keys that got slower than `tolerance`
+    previous = {(r["scale"], r["stage"]): r for r in old["runs"] if r["status"] == "ok"}
+    slower = []
+    print(f"[INFO] Compared with {old.get('label')} ({old.get('created')})")
+    for r in new["runs"]:
+        before = previous.get((r["scale"], r["stage"]))
+        if r["status"] != "ok" or before is None:
+            continue
+        ratio = r["seconds"] / max(before["seconds"], 1e-9)
+        rss = r["peak_rss_mib"] / max(before["peak_rss_mib"], 1e-9)
+        flag = ""
+        # Sub-100 ms differences are noise
+        if ratio > tolerance and r["seconds"] - before["seconds"] > 0.1:
+            slower.append((r["scale"], r["stage"]))
+            flag = "  <- slower"
+        print(f"  {r['scale']:>5}x {r['stage']:<18} {before['seconds']:8.2f}s -> {r['seconds']:8.2f}s "
+              f"({ratio:.2f}x), RSS {rss:.2f}x{flag}")
+    return slower
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark extraction and generation on synthetic scaled data")
+    parser.add_argument("--scales", type=float, nargs="+", default=SCALES,
+                        help=f"multiples of the {BASE_WARDS} real wards")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--degree", type=int, default=DEGREE,
+                        help="partners per ward in the synthetic dir/dis tables")
+    parser.add_argument("--max-pairs", type=int, default=MAX_PAIRS,
+                        help="skip stages that would handle more pairs than this")
+    parser.add_argument("--output", help=f"results JSON (default: {BENCH_DIR}/<git commit>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to compare with")
+    parser.add_argument("--work-dir", help="keep the synthetic tables and outputs here")
+    parser.add_argument("--child", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--scale", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--work", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        return run_child(args)
+
+    stages = [s for s in STAGES if s in args.stages]
+    generation = STAGES[STAGES.index("load"):]
+    if any(s in generation for s in stages) and "synth" not in stages:
+        stages.insert(0, "synth")
+    label = git_label()
+    work_root = args.work_dir or tempfile.mkdtemp(prefix="geobench-")
+    runs, synth = [], None
+    try:
+        for scale in args.scales:
+            work = os.path.abspath(os.path.join(work_root, f"scale_{scale:g}"))
+            os.makedirs(work, exist_ok=True)
+            for stage in stages:
+                if stage in generation and runs[synth]["status"] != "ok":
+                    runs.append({"scale": scale, "stage": stage, "wards": ward_count(scale),
+                                 "status": "skipped", "reason": "no synthetic relations"})
+                else:
+                    runs.append(run_stage(stage, scale, args, work))
+                r = runs[-1]
+                if stage == "synth":
+                    synth = len(runs) - 1
+                if r["status"] == "ok":
+                    print(f"[DONE] {scale:g}x {stage}: {r['seconds']:.2f}s, "
+                          f"peak RSS {r['peak_rss_mib']:.0f} MiB")
+                elif r["status"] == "skipped":
+                    print(f"[SKIP] {scale:g}x {stage}: {r['reason']}")
+                else:
+                    print(f"[ERROR] {scale:g}x {stage} failed: {r['reason']}", file=sys.stderr)
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    results = {
+        "label": label, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {"scales": args.scales, "seed": args.seed, "degree": args.degree,
+                     "max_pairs": args.max_pairs, "base_wards": BASE_WARDS},
+        "platform": {"python": platform.python_version(), "machine": platform.machine(),
+                     "system": platform.system(), "cpus": os.cpu_count(),
+                     "numpy": np.__version__, "pandas": pd.__version__, "shapely": shapely.__version__},
+        "runs": runs, "scaling": scaling(runs)}
+    for stage, steps in results["scaling"].items():
+        for step in steps:
+            if step["exponent"] > SUPERLINEAR:
+                print(f"[WARN] {stage} grows as scale^{step['exponent']:.2f} "
+                      f"from {step['from']:g}x to {step['to']:g}x")
+
+    output = args.output or os.path.join(BENCH_DIR, f"{label}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    tmp = f"{output}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    os.replace(tmp, output)
+    print(f"[INFO] Saved {output}")
+
+    failed = any(r["status"] == "failed" for r in runs)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            if compare(json.load(f), results):
+                return 1
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
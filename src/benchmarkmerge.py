@@ -2,9 +2,13 @@
 import os
 import pandas as pd
 
+from tables import find_table, read_table
+from writers import ChunkedTableWriter
+
 BASE_DIR = "./Geodata/results"
-YESNO_DIR = os.path.join(BASE_DIR, "binary")
-MCQ_DIR = os.path.join(BASE_DIR, "mcqs")
+# Merged files, relative to the results directory; subsets are read from the same folder
+MCQ_OUTPUT = os.path.join("mcqs", "geobenchmark_all_mcq.csv")
+YESNO_OUTPUT = os.path.join("binary", "geoBenchmark_all_yesno.csv")
 
 DIR_TOKENS = {"north", "south", "east", "west"}
 DIS_TOKENS = {"near", "far", "close", "distant"}
@@ -24,70 +28,63 @@ YESNO_FILES = {
     "top_dis_yesno.csv": {"concept": 2, "relations": {"dir": 0, "dis": 1, "top": 1}},
     "3_concept_yesno.csv": {"concept": 3, "relations": {"dir": 1, "dis": 1, "top": 1}},}
 
-def parse_relations(rel):
-    rel = str(rel).strip().lower()
+MCQ_COLUMNS = ["question", "options", "answer", "option_sources", "concept", "dir", "dis", "top"]
+YESNO_COLUMNS = ["question", "answer", "transition", "concept", "dir", "dis", "top"]
+
+# Relation flags: constant per compositional file, from the `relation`
+# column for atomic files
+def relation_flags(df, meta):
+    if meta["relations"] is not None:
+        return meta["relations"]
+    if "relation" in df.columns:
+        rel = df["relation"].astype(str).str.strip().str.lower()
+    else:
+        rel = pd.Series("", index=df.index)
     return {
-        "dir": 1 if rel in DIR_TOKENS else 0,
-        "dis": 1 if rel in DIS_TOKENS else 0,
-        "top": 1 if rel in TOP_TOKENS else 0,}
+        "dir": rel.isin(DIR_TOKENS).astype(int),
+        "dis": rel.isin(DIS_TOKENS).astype(int),
+        "top": rel.isin(TOP_TOKENS).astype(int),}
 
-# Merge MCQ datasets
-def process_mcq():
-    rows = []
-    for fname, meta in MCQ_FILES.items():
-        path = os.path.join(MCQ_DIR, fname)
-        if not os.path.exists(path):
-            print(f"[WARN] Missing MCQ file: {fname}")
-            continue
+def mcq_frame(df, meta):
+    if "option_sources" not in df.columns:
+        df["option_sources"] = "unknown"
+    return df.assign(concept=meta["concept"], **relation_flags(df, meta))
 
-        df = pd.read_csv(path)
-        if "option_sources" not in df.columns:
-            df["option_sources"] = "unknown"
+def yesno_frame(df, meta):
+    if "transition" not in df.columns:
+        df["transition"] = "unknown"
+    return df.assign(concept=meta["concept"], **relation_flags(df, meta))
 
-        for _, r in df.iterrows():
-            flags = parse_relations(r.get("relation", "")) if meta["relations"] is None else meta["relations"]
-            rows.append({
-                "question": r["question"],
-                "options": r["options"],
-                "answer": r["answer"],
-                "option_sources": r["option_sources"],
-                "concept": meta["concept"],
-                "dir": flags["dir"],
-                "dis": flags["dis"],
-                "top": flags["top"],
-            })
+# Subset tables the merge reads, by their .csv path
+def subset_paths(base_dir=BASE_DIR):
+    return [os.path.join(base_dir, os.path.dirname(out), fname)
+            for out, files in [(MCQ_OUTPUT, MCQ_FILES), (YESNO_OUTPUT, YESNO_FILES)]
+            for fname in files]
 
-    df_all = pd.DataFrame(rows)
-    out_path = os.path.join(MCQ_DIR, "geobenchmark_all_mcq.csv")
-    df_all.to_csv(out_path, index=False)
-    print(f"[INFO] Wrote merged MCQ benchmark {out_path} ({len(df_all)} rows)")
+# Append each subset to the merged file in turn, so only one is in memory
+def merge(files, folder, kind, to_frame, columns, out_path):
+    with ChunkedTableWriter(out_path, columns) as writer:
+        for fname, meta in files.items():
+            path = find_table(os.path.join(folder, fname))
+            if path is None:
+                print(f"[WARN] Missing {kind} file: {fname}")
+                continue
+            writer.write_frame(to_frame(read_table(path), meta))
+    return writer.path, writer.rows
 
-# Merge Yes/No datasets
-def process_yesno():
-    rows = []
-    for fname, meta in YESNO_FILES.items():
-        path = os.path.join(YESNO_DIR, fname)
-        if not os.path.exists(path):
-            print(f"[WARN] Missing Yes/No file: {fname}")
-            continue
-
-        df = pd.read_csv(path)
-        for _, r in df.iterrows():
-            flags = parse_relations(r.get("relation", "")) if meta["relations"] is None else meta["relations"]
-            rows.append({
-                "question": r["question"],
-                "answer": r["answer"],
-                "transition": r.get("transition", "unknown"),
-                "concept": meta["concept"],
-                "dir": flags["dir"],
-                "dis": flags["dis"],
-                "top": flags["top"],
-            })
+# Merge MCQ datasets
+def process_mcq(base_dir=BASE_DIR):
+    out_path = os.path.join(base_dir, MCQ_OUTPUT)
+    out_path, rows = merge(MCQ_FILES, os.path.dirname(out_path), "MCQ", mcq_frame,
+                           MCQ_COLUMNS, out_path)
+    print(f"[INFO] Wrote merged MCQ benchmark {out_path} ({rows} rows)")
 
-    df_all = pd.DataFrame(rows)
-    out_path = os.path.join(YESNO_DIR, "geoBenchmark_all_yesno.csv")
-    df_all.to_csv(out_path, index=False)
-    print(f"[INFO] Wrote merged Yes/No benchmark {out_path} ({len(df_all)} rows)")
+# Merge Yes/No datasets
+def process_yesno(base_dir=BASE_DIR):
+    out_path = os.path.join(base_dir, YESNO_OUTPUT)
+    out_path, rows = merge(YESNO_FILES, os.path.dirname(out_path), "Yes/No", yesno_frame,
+                           YESNO_COLUMNS, out_path)
+    print(f"[INFO] Wrote merged Yes/No benchmark {out_path} ({rows} rows)")
 
 if __name__ == "__main__":
     process_mcq()
@@ -0,0 +1,244 @@
+"""
+Incremental build of the generated benchmark.
+Every stage declares its inputs (relation tables or upstream outputs, source
+files, settings such as the seed and its spec) and its outputs. A stage is
+rerun only when the fingerprint of its inputs differs from the one stored in
+the build state, or when one of its outputs is missing or was modified since.
+Stages whose dependencies are done run in parallel processes.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import atomicconcept
+import benchmarkmerge
+import compositional
+import run_all_concepts
+from conceptspecs import FAMILIES, SPECS
+from relationstore import FILES
+from tables import TABLE_FORMAT, find_table, table_path
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = ".build_state.json"
+GENERATOR_SOURCES = ["run_all_concepts.py", "sampling.py", "tables.py", "writers.py"]
+
+def graph(rel_dir, base_dir, seed):
+    # {stage: {"after", "inputs", "sources", "settings", "outputs"}} in
+    # dependency order; inputs and outputs are tables named by their .csv path
+    stages = {"atomic": {
+        "after": [],
+        "inputs": [os.path.join(rel_dir, name) for name in FILES.values()],
+        "sources": ["atomicconcept.py"] + GENERATOR_SOURCES,
+        "settings": {"seed": seed},
+        "outputs": [os.path.join(base_dir, p) for p in atomicconcept.OUTPUTS.values()]}}
+    for name, spec in SPECS.items():
+        stages[name] = {
+            "after": [],
+            "inputs": [os.path.join(rel_dir, FILES[f]) for f in spec["families"]],
+            "sources": ["compositional.py", "relationstore.py"] + GENERATOR_SOURCES,
+            "settings": {"seed": seed, "spec": spec,
+                         "families": {f: FAMILIES[f] for f in spec["families"]}},
+            "outputs": [os.path.join(base_dir, p) for p in spec["outputs"].values()]}
+    # The merge reads a fixed list of files; a subset written elsewhere shows
+    # up as a missing input instead of being left out silently
+    stages["merge"] = {
+        "after": list(stages),
+        "inputs": benchmarkmerge.subset_paths(base_dir),
+        "sources": ["benchmarkmerge.py", "tables.py", "writers.py"],
+        "settings": {},
+        "outputs": [os.path.join(base_dir, benchmarkmerge.MCQ_OUTPUT),
+                    os.path.join(base_dir, benchmarkmerge.YESNO_OUTPUT)]}
+    return stages
+
+def file_hash(path, known):
+    # sha256 of a file; `known` ({path: [size, mtime_ns, hash]}) skips
+    # rehashing files that were not touched since the last build
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    if known.get(key, [None, None])[:2] == [st.st_size, st.st_mtime_ns]:
+        return known[key][2]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    known[key] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+    return known[key][2]
+
+def fingerprint(stage, known):
+    inputs = []
+    for table in stage["inputs"]:
+        path = find_table(table)
+        if path is None:
+            raise FileNotFoundError(f"missing input {table}")
+        inputs.append([os.path.basename(path), file_hash(path, known)])
+    doc = {"inputs": inputs,
+           "sources": {s: file_hash(os.path.join(SRC_DIR, s), known) for s in stage["sources"]},
+           "settings": stage["settings"], "format": TABLE_FORMAT}
+    return hashlib.sha256(json.dumps(doc, sort_keys=True).encode("utf-8")).hexdigest()
+
+def output_hashes(stage, known):
+    return {table_path(out): file_hash(table_path(out), known) for out in stage["outputs"]}
+
+def up_to_date(record, fp, stage, known):
+    if record is None or record["fingerprint"] != fp:
+        return False
+    try:
+        return output_hashes(stage, known) == record["outputs"]
+    except OSError:
+        return False
+
+def load_state(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"stages": {}, "files": {}}
+
+def save_state(path, state):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+# Relation tables, and a store per set of families, loaded once per process
+# for the generator stages
+_LOADED = {}
+
+def run_stage(name, rel_dir, base_dir, seed):
+    start = time.perf_counter()
+    if name == "merge":
+        benchmarkmerge.process_mcq(base_dir)
+        benchmarkmerge.process_yesno(base_dir)
+    else:
+        if rel_dir not in _LOADED:
+            _LOADED[rel_dir] = {"frames": run_all_concepts.load_relations(rel_dir)}
+        loaded = _LOADED[rel_dir]
+        store = None
+        if name in SPECS:
+            # Only the spec's families, which are all the stage declares as inputs
+            families = tuple(SPECS[name]["families"])
+            if families not in loaded:
+                loaded[families] = compositional.build_store({f: loaded["frames"][f] for f in families})
+            store = loaded[families]
+        run_all_concepts.run_stage(name, loaded["frames"], store, seed, base_dir, None)
+    return time.perf_counter() - start
+
+def required(stages, targets):
+    # Targets plus everything they depend on, in graph order
+    needed, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in needed:
+            needed.add(name)
+            todo += stages[name]["after"]
+    return [name for name in stages if name in needed]
+
+def build(targets=None, rel_dir=run_all_concepts.REL_DIR, base_dir=run_all_concepts.BASE_DIR,
+          seed=compositional.SEED, jobs=compositional.WORKERS, force=False, dry_run=False):
+    # Returns ({stage: "ran" | "up to date" | "failed" | "skipped"}) for the
+    # targets and their dependencies
+    stages = graph(rel_dir, base_dir, seed)
+    state_path = os.path.join(base_dir, STATE_FILE)
+    state = load_state(state_path)
+    known = state["files"]
+    pending, running, status = required(stages, targets or list(stages)), {}, {}
+    pool = ProcessPoolExecutor(jobs) if jobs > 1 and not dry_run else None
+
+    def finish(name, fp, error=None, elapsed=0.0):
+        if error is None:
+            try:
+                outputs = output_hashes(stages[name], known)
+            except OSError as e:
+                error = f"output not written ({e})"
+        if error is not None:
+            print(f"[ERROR] {name} failed: {error}", file=sys.stderr)
+            status[name] = "failed"
+            return
+        state["stages"][name] = {"fingerprint": fp, "outputs": outputs}
+        save_state(state_path, state)
+        status[name] = "ran"
+        print(f"[DONE] {name} ({elapsed:.1f}s)")
+
+    try:
+        while pending or running:
+            for name in list(pending):
+                after = stages[name]["after"]
+                if any(status.get(d) in ("failed", "skipped") for d in after):
+                    pending.remove(name)
+                    status[name] = "skipped"
+                    print(f"[SKIP] {name}: a dependency failed", file=sys.stderr)
+                    continue
+                if not all(d in status for d in after):
+                    continue
+                pending.remove(name)
+                if dry_run and any(status[d] == "ran" for d in after):
+                    status[name] = "ran"
+                    print(f"[PLAN] {name} would run (dependency changed)")
+                    continue
+                try:
+                    fp = fingerprint(stages[name], known)
+                except OSError as e:
+                    finish(name, None, e)
+                    continue
+                if not force and up_to_date(state["stages"].get(name), fp, stages[name], known):
+                    status[name] = "up to date"
+                    print(f"[INFO] {name} is up to date")
+                elif dry_run:
+                    status[name] = "ran"
+                    print(f"[PLAN] {name} would run")
+                elif pool is None:
+                    try:
+                        elapsed = run_stage(name, rel_dir, base_dir, seed)
+                    except Exception as e:
+                        finish(name, fp, e)
+                    else:
+                        finish(name, fp, elapsed=elapsed)
+                else:
+                    running[pool.submit(run_stage, name, rel_dir, base_dir, seed)] = (name, fp)
+            if running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, fp = running.pop(future)
+                    try:
+                        finish(name, fp, elapsed=future.result())
+                    except Exception as e:
+                        finish(name, fp, e)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if not dry_run:
+            save_state(state_path, state)
+    return status
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the GeoBenchmark subsets and merged files incrementally")
+    parser.add_argument("targets", nargs="*",
+                        help="stages to bring up to date, with their dependencies "
+                             f"({', '.join(run_all_concepts.STAGES)}, merge; default: all)")
+    parser.add_argument("--relations-dir", default=run_all_concepts.REL_DIR)
+    parser.add_argument("--output-dir", default=run_all_concepts.BASE_DIR)
+    parser.add_argument("--seed", type=int, default=compositional.SEED)
+    parser.add_argument("--jobs", type=int, default=compositional.WORKERS,
+                        help="stages run in parallel")
+    parser.add_argument("--force", action="store_true", help="rerun every selected stage")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would run")
+    args = parser.parse_args(argv)
+
+    unknown = [t for t in args.targets if t not in run_all_concepts.STAGES + ["merge"]]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+    start = time.perf_counter()
+    status = build(args.targets, args.relations_dir, args.output_dir, args.seed,
+                   args.jobs, args.force, args.dry_run)
+    ran = [name for name, s in status.items() if s == "ran"]
+    print(f"[INFO] Build wall time {time.perf_counter() - start:.1f}s; "
+          f"{'would run' if args.dry_run else 'ran'}: {', '.join(ran) or 'nothing'}")
+    return 1 if any(s in ("failed", "skipped") for s in status.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,256 @@
+"""
+Generic k-relation compositional question engine.
+Every subset in conceptspecs.SPECS is generated from one RelationStore load:
+chains of k relations sharing a subject place are selected per the spec's
+rule, then rendered into Yes/No rows (one true, one perturbed) and 3-option
+MCQs (correct, partial-match and random distractor).
+Subjects are sharded across a process pool. Each subject place draws from its
+own seed-derived stream, so the output is identical for any worker count.
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from conceptspecs import FAMILIES, SPECS
+from relationstore import RelationStore, partial_matches
+from sampling import DistractorSampler
+from tables import table_path
+from writers import write_rows
+
+BASE_DIR = os.path.join("..", "geodata", "results")
+REL_DIR = os.path.join("..", "geodata", "relations")
+SEED = 42
+WORKERS = int(os.getenv("GENERATE_WORKERS", str(os.cpu_count() or 1)))
+SHARD_SIZE = int(os.getenv("GENERATE_SHARD_SIZE", "256"))
+# Shards in flight at once; bounds memory when the writer is the bottleneck
+PENDING_SHARDS = int(os.getenv("GENERATE_PENDING_SHARDS", "16"))
+PLACE_COLUMNS = ["place2_Y", "place2_Z", "place2_W", "place2_V"]
+
+def load_store(names, rel_dir=REL_DIR):
+    families = {f for name in names for f in SPECS[name]["families"]}
+    return RelationStore.load(rel_dir, **{f: FAMILIES[f]["tokens"] for f in families})
+
+def build_store(frames):
+    # Store over already loaded relation frames ({"dir": df, ...})
+    return RelationStore({f: (df, FAMILIES[f]["tokens"]) for f, df in frames.items()})
+
+def columns(spec):
+    head = ["place1"]
+    for f, col in zip(spec["families"], PLACE_COLUMNS):
+        head += [f, col]
+    return (head + ["triplet", "question", "answer", "transition"],
+            head + ["triplet", "question", "options", "answer", "option_sources"])
+
+def subjects(store, families):
+    # Places that are place1 in every family, in id (= name) order
+    ids = store[families[0]].place1
+    for f in families[1:]:
+        ids = np.intersect1d(ids, store[f].place1)
+    return np.unique(ids)
+
+def subject_rng(name, seed, place):
+    # Independent stream per (subset, subject place), whichever shard runs it.
+    # Keyed on the place name: ids depend on which families the store holds.
+    place_key = int.from_bytes(hashlib.blake2b(place.encode("utf-8"), digest_size=8).digest(), "big")
+    ss = np.random.SeedSequence(seed, spawn_key=(zlib.crc32(name.encode()), place_key))
+    return random.Random(int(ss.generate_state(1, np.uint64)[0]))
+
+# Each rule has a plan, run once from the root stream, that fixes the subjects
+# (and anything decided across subjects) as (subject id, combo) tasks, and a
+# chain picker that yields {family: row} for one task from its subject stream
+def plan_per_subject(store, spec, rng):
+    rule = spec["select"]
+    candidates = subjects(store, [rule["lead"], rule["partner"]]).tolist()
+    rng.shuffle(candidates)
+    return [(p, None) for p in candidates]
+
+def chains_per_subject(store, spec, p, combo, rng):
+    rule = spec["select"]
+    lead, partner = store[rule["lead"]], store[rule["partner"]]
+    partner_tokens = FAMILIES[rule["partner"]]["tokens"]
+    used = []
+    for lead_tok in FAMILIES[rule["lead"]]["tokens"]:
+        lead_rows = lead.rows(p, lead_tok)
+        if not len(lead_rows):
+            continue
+        lead_row = rng.choice(lead_rows)
+        order = rule.get("priority", {}).get(lead_tok, partner_tokens)
+        for _ in range(rule["per_lead"]):
+            available = [t for t in order if t not in used]
+            if "priority" in rule:
+                available = available[:1]
+            partner_rows = partner.rows(p, available)
+            if not len(partner_rows):
+                break
+            partner_row = rng.choice(partner_rows)
+            used.append(partner.edge(partner_row)[0])
+            yield {rule["lead"]: lead_row, rule["partner"]: partner_row}
+
+def plan_combos(store, spec, rng):
+    families = spec["families"]
+    combos = store.combos(subjects(store, families),
+                          [(f, FAMILIES[f]["tokens"]) for f in families])
+    tasks, used = [], set()
+    for combo, candidates in combos.items():
+        candidates = candidates.tolist()
+        rng.shuffle(candidates)
+        count = 0
+        for p in candidates:
+            if p in used:
+                continue
+            tasks.append((p, combo))
+            used.add(p)
+            count += 1
+            if count >= spec["select"]["per_combo"]:
+                break
+    return tasks
+
+def chains_combo(store, spec, p, combo, rng):
+    yield {f: rng.choice(store[f].rows(p, tok)) for f, tok in zip(spec["families"], combo)}
+
+RULES = {"per_subject": (plan_per_subject, chains_per_subject),
+         "combo": (plan_combos, chains_combo)}
+
+def templates_for(spec, tokens):
+    if "template_key" in spec:
+        return spec["templates"][tokens[spec["template_key"]]]
+    return spec["templates"]
+
+def render(store, spec, sampler, p, rows, rng):
+    # One chain -> two Yes/No rows and one MCQ row
+    x = store.places[p]
+    tokens, fields, values = {}, {"x": x}, [x]
+    for f in spec["families"]:
+        tok, obj = store[f].edge(rows[f])
+        tokens[f] = fields[f] = tok
+        fields[spec["slots"][f]] = obj
+        values += [tok, obj]
+    triplet = spec["triplet"].format(**fields)
+    templates = templates_for(spec, tokens)
+
+    q_yes = templates["yesno"].format(**fields)
+    r = rng.random()
+    change = next(t for t in spec["transitions"] if r < t["upto"])
+    no_tokens = dict(tokens)
+    for f in change.get("opposite", []):
+        no_tokens[f] = FAMILIES[f]["opposites"][tokens[f]]
+    no_fields = {**fields, **no_tokens}
+    if "swap" in change:
+        slot = change["swap"]
+        no_fields["x"], no_fields[slot] = fields[slot], x
+    q_no = templates_for(spec, no_tokens)["yesno"].format(**no_fields)
+    yesno = [values + [triplet, q_yes, "Yes", "no_change"],
+             values + [triplet, q_no, "No", change["label"]]]
+
+    matches = [store[f].reverse(store[f].place2[rows[f]], tokens[f]) for f in spec["families"]]
+    partial_candidates = store.names(partial_matches(matches, spec["partial_min"], exclude=p))
+    partial_neg = rng.choice(partial_candidates) if partial_candidates else sampler.draw(x, rng)
+    rand_neg = sampler.draw(x, rng)
+
+    combined = list(zip([x, partial_neg, rand_neg], ["correct", "partial", "random"]))
+    rng.shuffle(combined)
+    opts, sources = zip(*combined)
+    ans_letter = "ABC"[opts.index(x)]
+    mcq = values + [
+        triplet, templates["mcq"].format(**fields),
+        "\n".join(f"{l}. {o}" for l, o in zip("ABC", opts)),
+        f"{ans_letter}. {x}", ",".join(sources)]
+    return yesno, mcq
+
+def generate_shard(store, sampler, name, seed, tasks):
+    spec = SPECS[name]
+    chains = RULES[spec["select"]["rule"]][1]
+    yesno_rows, mcq_rows = [], []
+    for p, combo in tasks:
+        rng = subject_rng(name, seed, store.places[p])
+        for rows in chains(store, spec, p, combo, rng):
+            yesno, mcq = render(store, spec, sampler, p, rows, rng)
+            yesno_rows += yesno
+            mcq_rows.append(mcq)
+    return yesno_rows, mcq_rows
+
+# Pool workers receive the store once and build their samplers lazily
+_WORKER = {}
+
+def _init_worker(store):
+    _WORKER["store"], _WORKER["samplers"] = store, {}
+
+def open_pool(store, workers):
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(store,))
+
+def _worker_shard(name, seed, tasks):
+    store, samplers = _WORKER["store"], _WORKER["samplers"]
+    if name not in samplers:
+        samplers[name] = DistractorSampler(store.places_of(SPECS[name]["families"]))
+    return generate_shard(store, samplers[name], name, seed, tasks)
+
+def _pooled_shards(pool, name, seed, shards):
+    # Like pool.map, but with at most PENDING_SHARDS results held at a time
+    pending = deque()
+    for shard in shards:
+        pending.append(pool.submit(_worker_shard, name, seed, shard))
+        if len(pending) >= PENDING_SHARDS:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def generate(store, name, seed=SEED, pool=None):
+    # Yields ("yesno", row) and ("mcq", row) shard by shard, in plan order,
+    # so `pool` only changes the speed
+    spec = SPECS[name]
+    tasks = RULES[spec["select"]["rule"]][0](store, spec, random.Random(seed))
+    shards = [tasks[i:i + SHARD_SIZE] for i in range(0, len(tasks), SHARD_SIZE)]
+    if pool is None:
+        sampler = DistractorSampler(store.places_of(spec["families"]))
+        results = (generate_shard(store, sampler, name, seed, shard) for shard in shards)
+    else:
+        results = _pooled_shards(pool, name, seed, shards)
+    for yesno, mcq in results:
+        for row in yesno:
+            yield "yesno", row
+        for row in mcq:
+            yield "mcq", row
+
+def write(name, rows, base_dir=BASE_DIR):
+    spec = SPECS[name]
+    yesno_cols, mcq_cols = columns(spec)
+    outputs = {"yesno": (os.path.join(base_dir, spec["outputs"]["yesno"]), yesno_cols),
+               "mcq": (os.path.join(base_dir, spec["outputs"]["mcq"]), mcq_cols)}
+    counts = write_rows(rows, outputs)
+    for kind, (path, _) in outputs.items():
+        print(f"[INFO] Saved {table_path(path)} ({counts[kind]} rows)")
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate compositional benchmark subsets")
+    parser.add_argument("specs", nargs="*", help=f"subsets to generate: {', '.join(SPECS)} (default: all)")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="generator processes; output does not depend on it")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.specs if name not in SPECS]
+    if unknown:
+        parser.error(f"unknown subset(s): {', '.join(unknown)}")
+    names = args.specs or list(SPECS)
+    store = load_store(names)
+    pool = open_pool(store, args.workers)
+    try:
+        for name in names:
+            write(name, generate(store, name, args.seed, pool))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,112 @@
+# Declarative specs for the compositional (multi-relation) benchmark subsets.
+# Each spec lists its relation families in column order; the engine in
+# compositional.py turns a spec into Yes/No and MCQ files.
+import os
+
+FAMILIES = {
+    "dir": {
+        "tokens": ["north", "east", "south", "west"],
+        "opposites": {"north": "south", "south": "north", "east": "west", "west": "east"}},
+    "top": {
+        "tokens": ["within", "borders"],
+        "opposites": {"within": "borders", "borders": "within"}},
+    "dis": {
+        "tokens": ["near", "close", "distant", "far"],
+        "opposites": {"near": "far", "far": "near", "close": "distant", "distant": "close"}},
+}
+
+# Spec fields:
+#   families     relation families in output column order
+#   slots        template placeholder for each family's related place
+#   select       how chains are picked:
+#                  per_subject: for every subject place and every `lead` token,
+#                    up to `per_lead` `partner` rows whose tokens are distinct
+#                    for that subject, tried in `priority` order when given
+#                  combo: every token combination of all families, up to
+#                    `per_combo` subjects each, every subject used once
+#   templates    "mcq"/"yesno" templates, keyed by the token of the
+#                `template_key` family when set
+#   transitions  negative Yes/No variants, picked with random() < upto;
+#                `swap` exchanges the subject with a slot, `opposite` replaces
+#                a family's token by its opposite
+#   partial_min  constraints an MCQ partial distractor has to satisfy
+SPECS = {
+    "dis_dir": {
+        "families": ["dis", "dir"],
+        "slots": {"dis": "y", "dir": "z"},
+        "select": {"rule": "per_subject", "lead": "dis", "partner": "dir", "per_lead": 1},
+        "templates": {
+            "mcq": "Which city is {dis} to {y} and also {dir} from {z}?",
+            "yesno": "Is {x} {dis} to {y} and {dir} of {z}?"},
+        "triplet": "{x} is {dis} {y}, {dir} {z}",
+        "transitions": [
+            {"upto": 0.33, "label": "flip_place_replace_distance", "swap": "y", "opposite": ["dis"]},
+            {"upto": 0.66, "label": "replace_distance", "opposite": ["dis"]},
+            {"upto": 1.0, "label": "replace_direction", "opposite": ["dir"]}],
+        "partial_min": 1,
+        "outputs": {"yesno": os.path.join("binary", "dis_dir_yesno.csv"),
+                    "mcq": os.path.join("mcqs", "dis_dir_mcq.csv")},
+    },
+    "dir_top": {
+        "families": ["dir", "top"],
+        "slots": {"dir": "y", "top": "z"},
+        "select": {"rule": "per_subject", "lead": "top", "partner": "dir", "per_lead": 1},
+        "templates": {
+            "mcq": "Which city lies {dir} to {y} and {top} {z}?",
+            "yesno": "Is {x} {dir} of {y} and {top} {z}?"},
+        "triplet": "{x} is {dir} {y}, {top} {z}",
+        "transitions": [
+            {"upto": 0.25, "label": "flip_place_y", "swap": "y"},
+            {"upto": 0.5, "label": "replace_dir_token", "opposite": ["dir"]},
+            {"upto": 0.75, "label": "replace_top_token", "opposite": ["top"]},
+            {"upto": 1.0, "label": "flip_place_z", "swap": "z"}],
+        "partial_min": 1,
+        "outputs": {"yesno": os.path.join("binary", "dir_top_yesno.csv"),
+                    "mcq": os.path.join("mcqs", "dir_top_mcq.csv")},
+    },
+    "top_dis": {
+        "families": ["top", "dis"],
+        "slots": {"top": "y", "dis": "z"},
+        "select": {"rule": "per_subject", "lead": "top", "partner": "dis", "per_lead": 2,
+                   "priority": {"borders": ["near", "close", "distant", "far"],
+                                "within": ["distant", "far", "near", "close"]}},
+        "template_key": "top",
+        "templates": {
+            "within": {
+                "mcq": "Which city is {top} {y} and also {dis} to {z}?",
+                "yesno": "Is {x} {top} {y} and {dis} to {z}?"},
+            "borders": {
+                "mcq": "Which city {top} {y} and is also {dis} to {z}?",
+                "yesno": "Does {x} {top} {y} and {dis} to {z}?"}},
+        "triplet": "{x} is {top} {y}, {dis} {z}",
+        "transitions": [
+            {"upto": 0.33, "label": "replace_top_token", "opposite": ["top"]},
+            {"upto": 0.66, "label": "replace_dis_token", "opposite": ["dis"]},
+            {"upto": 1.0, "label": "flip_place", "swap": "y"}],
+        "partial_min": 1,
+        "outputs": {"yesno": os.path.join("binary", "top_dis_yesno.csv"),
+                    "mcq": os.path.join("mcqs", "top_dis_mcq.csv")},
+    },
+    "3_concept": {
+        "families": ["dir", "top", "dis"],
+        "slots": {"top": "y", "dis": "z", "dir": "w"},
+        "select": {"rule": "combo", "per_combo": 22},
+        "template_key": "top",
+        "templates": {
+            "within": {
+                "mcq": "Which city is within {y} and also {dis} to {z} and {dir} of {w}?",
+                "yesno": "Is {x} within {y} and {dis} to {z} and {dir} of {w}?"},
+            "borders": {
+                "mcq": "Which city borders {y} and is also {dis} to {z} and {dir} of {w}?",
+                "yesno": "Does {x} border {y} and {dis} to {z} and {dir} of {w}?"}},
+        "triplet": "{x} is {top} {y}, {dis} to {z}, and {dir} of {w}",
+        "transitions": [
+            {"upto": 0.25, "label": "replace_top_token", "opposite": ["top"]},
+            {"upto": 0.5, "label": "replace_dis_token", "opposite": ["dis"]},
+            {"upto": 0.75, "label": "replace_dir_token", "opposite": ["dir"]},
+            {"upto": 1.0, "label": "flip_place", "swap": "y"}],
+        "partial_min": 2,
+        "outputs": {"yesno": os.path.join("binary", "3_concept_yesno.csv"),
+                    "mcq": os.path.join("mcqs", "3_concept_mcq.csv")},
+    },
+}
\ No newline at end of file
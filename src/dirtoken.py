@@ -1,65 +1,20 @@
 #Extraction of directional spatial relations (north, south, east, west)
 
-from SPARQLWrapper import SPARQLWrapper, JSON
-import urllib.request
+import numpy as np
 import pandas as pd
-from shapely import wkt
+import shapely
 import math
-import re
 import os
+import sys
 
-# Configurable endpoint for reproducibility
-GRAPHDB_ENDPOINT = os.getenv("GRAPHDB_ENDPOINT", "http://yourserver/repositories/yago")
-OUTPUT_PATH = "./results/relations/dir.csv"
-
-# Disable proxy interference
-proxy_support = urllib.request.ProxyHandler({})
-urllib.request.install_opener(urllib.request.build_opener(proxy_support))
-
-sparql = SPARQLWrapper(GRAPHDB_ENDPOINT)
-sparql.setReturnFormat(JSON)
-sparql.setQuery("""
-PREFIX geo: <http://www.opengis.net/ont/geosparql#>
-PREFIX yago: <http://kr.di.uoa.gr/yago2geo/ontology/>
-SELECT ?place1 ?wkt1 ?place2 ?wkt2 WHERE {
-  ?place1 a yago:OS_MetropolitanDistrictWard ; geo:hasGeometry/geo:asWKT ?wkt1 .
-  ?place2 a yago:OS_MetropolitanDistrictWard ; geo:hasGeometry/geo:asWKT ?wkt2 .
-  FILTER(?place1 != ?place2)
-}
-""")
-
-try:
-    res = sparql.queryAndConvert()
-    bindings = res["results"]["bindings"]
-    records = [{
-        "place1": b["place1"]["value"],
-        "wkt1": b["wkt1"]["value"],
-        "place2": b["place2"]["value"],
-        "wkt2": b["wkt2"]["value"]
-    } for b in bindings]
-except Exception as e:
-    print("SPARQL error:", e)
-    records = []
-df = pd.DataFrame(records)
-def clean_uri(uri):
-    name = uri.rsplit("/", 1)[-1]
-    name = re.sub(r'^(geoentity_|osentity_)', '', name)
-    name = re.sub(r'_[0-9]+$', '', name)
-    name = re.sub(r'[_\,]', ' ', name)
-    name = re.sub(r'\bWard$', '', name)
-    return re.sub(r'\s+', ' ', name).strip()
+from extraction import GRAPHDB_ENDPOINT, SparqlClient
+from geometry import load_geometries
+from incremental import FORCE_FULL, plan
+from pairmatrix import save_pair_matrices
+from placenames import clean_uris
+from tables import write_table
 
-def clean_wkt(wkt_str):
-    if wkt_str.startswith("<"):
-        return " ".join(wkt_str.split()[1:])
-    return wkt_str
-
-def get_centroid(wkt_str):
-    try:
-        geom = wkt.loads(clean_wkt(wkt_str))
-        return geom.centroid
-    except Exception:
-        return None
+OUTPUT_PATH = "./results/relations/dir.csv"
 
 def calculate_bearing(lat1, lon1, lat2, lon2):
     dLon = math.radians(lon2 - lon1)
@@ -78,20 +33,76 @@ def get_cardinal_direction(bearing):
     else:
         return "west"
 
-results = []
-for _, row in df.iterrows():
-    c1, c2 = get_centroid(row["wkt1"]), get_centroid(row["wkt2"])
-    if c1 and c2:
-        bearing = calculate_bearing(c2.y, c2.x, c1.y, c1.x)
-        direction = get_cardinal_direction(bearing)
-        results.append({
-            "place1": clean_uri(row["place1"]),
-            "place2": clean_uri(row["place2"]),
-            "bearing": round(bearing, 2),
-            "relation": direction
-        })
+# Sector edges for array binning; same boundaries as get_cardinal_direction
+DIRECTION_EDGES = np.array([45, 135, 225, 315])
+DIRECTION_LABELS = np.array(["north", "east", "south", "west", "north"])
+BOUNDARY_POINTS = np.array([0, 45, 135, 225, 315, 360])
+
+def calculate_bearings(lat1, lon1, lat2, lon2):
+    # Array version of calculate_bearing, same operation order
+    dLon = np.radians(lon2 - lon1)
+    lat1, lat2 = np.radians(lat1), np.radians(lat2)
+    y = np.sin(dLon) * np.cos(lat2)
+    x = np.cos(lat1) * np.sin(lat2) - \
+        np.sin(lat1) * np.cos(lat2) * np.cos(dLon)
+    return (np.degrees(np.arctan2(y, x)) + 360) % 360
+
+def direction_kernel(lat, lon, i=None, j=None):
+    # Bearing and direction for the ordered pairs (i, j); by default every
+    # pair with i != j, in row-major order
+    if i is None:
+        i, j = np.nonzero(~np.eye(len(lat), dtype=bool))
+    bearings = calculate_bearings(lat[j], lon[j], lat[i], lon[i])
+    rounded = np.round(bearings, 2)
+
+    # np.arctan2 may differ from math.atan2 in the last ulp; redo the few values
+    # sitting on a rounding tie or sector edge with the scalar path so the
+    # output stays identical to the per-row implementation
+    scaled = bearings * 100
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    near_edge = (np.abs(bearings[:, None] - BOUNDARY_POINTS) < 1e-9).any(axis=1)
+    for k in np.flatnonzero(near_tie | near_edge):
+        b = calculate_bearing(lat[j[k]], lon[j[k]], lat[i[k]], lon[i[k]])
+        bearings[k], rounded[k] = b, round(b, 2)
+
+    relations = DIRECTION_LABELS[np.digitize(bearings, DIRECTION_EDGES)]
+    return i, j, rounded, relations
+
+def extract(client, full=FORCE_FULL):
+    # One row per ward; ordered pairs are built locally from the centroids,
+    # computed once per ward (unparseable geometries were dropped). Only
+    # pairs involving new or changed wards are recomputed unless `full`.
+    wards, geoms = load_geometries(client, "OS_MetropolitanDistrictWard")
+    names = clean_uris(wards)
+    delta = plan(OUTPUT_PATH, wards, names, geoms, full=full)
+    centroids = shapely.centroid(geoms)
+    lat, lon = shapely.get_y(centroids), shapely.get_x(centroids)
+    i, j, bearings, relations = direction_kernel(lat, lon, *delta.pairs(ordered=True))
+
+    df_out = pd.DataFrame({
+        "place1": names[i],
+        "place2": names[j],
+        "bearing": bearings,
+        "relation": relations
+    })
+    valid = df_out.notna().all(axis=1).to_numpy()
+    return delta.merge(df_out[valid], np.c_[i, j][valid]), delta
+
+def run(client, full=FORCE_FULL):
+    # Extract and write OUTPUT_PATH; returns the number of rows written
+    df_out, delta = extract(client, full)
+    print(f"[INFO] {delta.summary()}")
+    write_table(df_out, OUTPUT_PATH)
+    save_pair_matrices(os.path.dirname(OUTPUT_PATH), "dir", delta.names, df_out)
+    delta.save()
+    return len(df_out)
+
+def main():
+    try:
+        run(SparqlClient(GRAPHDB_ENDPOINT))
+    except Exception as e:
+        print("[ERROR] SPARQL query failed:", e, file=sys.stderr)
+        sys.exit(1)
 
-df_out = pd.DataFrame(results)
-df_out.dropna(inplace=True)
-os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-df_out.to_csv(OUTPUT_PATH, index=False)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
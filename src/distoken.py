@@ -1,67 +1,114 @@
 #Extraction of distance spatial relations (near, close, distant, far)
 
-from SPARQLWrapper import SPARQLWrapper, JSON
+import numpy as np
 import pandas as pd
-import urllib.request
-import re
+import shapely
 import os
 import sys
 
-# Configurable endpoint
-GRAPHDB_ENDPOINT = os.getenv("GRAPHDB_ENDPOINT", "http://localhost:X/repositories/yago")
+from extraction import GRAPHDB_ENDPOINT, SparqlClient
+from geometry import great_circle_m, load_geometries, max_overstatement, mean_latitude, metre_scale, to_metres
+from incremental import FORCE_FULL, plan
+from pairmatrix import save_pair_matrices
+from placenames import clean_uris
+from tables import write_table
+
 OUTPUT_PATH = "./results/relations/dis.csv"
 
-# Disable proxy interference
-proxy_support = urllib.request.ProxyHandler({})
-urllib.request.install_opener(urllib.request.build_opener(proxy_support))
+# Upper bound (m) of each distance band; anything beyond the last is "far"
+DISTANCE_BANDS = [(5000, "near"), (25000, "close"), (80000, "distant")]
+# Farthest band to emit; "close" keeps only near/close pairs via the STRtree.
+# The default stays "far": dis.csv lists every ward pair with its distance,
+# and the far rows are used by the generators.
+MAX_BAND = os.getenv("DISTANCE_MAX_BAND", "far")
+CHUNK_SIZE = 100_000
+# Extra search radius for the projection's error beyond max_overstatement
+SEARCH_MARGIN = 1.01
+
+def band_limit(max_band):
+    limits = {token: limit for limit, token in DISTANCE_BANDS}
+    if max_band not in limits:
+        raise ValueError(f"Unknown distance band: {max_band}")
+    return limits[max_band]
+
+def candidate_pairs(geoms, max_band, delta, overstatement=1.0):
+    # Unordered pairs (i < j) to (re)compute; all of them, or those the
+    # STRtree finds within the band limit. geoms are projected; the search
+    # radius is widened by `overstatement` so no pair within the limit is
+    # missed, and the caller drops those beyond it once measured.
+    if max_band == "far":
+        return delta.pairs(ordered=False)
+    radius = band_limit(max_band) * overstatement * SEARCH_MARGIN
+    query = np.arange(len(geoms)) if delta.full else np.flatnonzero(delta.affected)
+    tree = shapely.STRtree(geoms)
+    qi, j = tree.query(geoms[query], predicate="dwithin", distance=radius)
+    i = query[qi]
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    keep = i < j
+    pair_ids = np.unique(i[keep] * len(geoms) + j[keep])
+    return pair_ids // len(geoms), pair_ids % len(geoms)
+
+def pair_distances(geoms, i, j, lat0, chunk_size=CHUNK_SIZE):
+    # Great-circle distance between the closest points of each pair, which
+    # GEOS finds on the projected geoms (to_metres around lat0); chunked to
+    # bound temporary arrays
+    kx, ky = metre_scale(lat0)
+    dist = np.empty(len(i))
+    for start in range(0, len(i), chunk_size):
+        stop = start + chunk_size
+        lines = shapely.shortest_line(geoms[i[start:stop]], geoms[j[start:stop]])
+        ends = shapely.get_coordinates(lines).reshape(-1, 2, 2) / [kx, ky]
+        dist[start:stop] = great_circle_m(ends[:, 0, 0], ends[:, 0, 1], ends[:, 1, 0], ends[:, 1, 1])
+    return dist
 
-sparql = SPARQLWrapper(GRAPHDB_ENDPOINT)
-sparql.setReturnFormat(JSON)
-sparql.setQuery("""
-PREFIX geo:  <http://www.opengis.net/ont/geosparql#>
-PREFIX geof: <http://www.opengis.net/def/function/geosparql/>
-PREFIX uom:  <http://www.opengis.net/def/uom/OGC/1.0/>
-PREFIX yago: <http://kr.di.uoa.gr/yago2geo/ontology/>
+def distance_tokens(dist):
+    limits = [limit for limit, _ in DISTANCE_BANDS]
+    labels = np.array([token for _, token in DISTANCE_BANDS] + ["far"])
+    return labels[np.searchsorted(limits, dist, side="left")]
 
-SELECT ?ward1 ?ward2 ?dist
-       (IF(?dist <= 5000,   "near",
-        IF(?dist <= 25000,  "close",
-        IF(?dist <= 80000,  "distant", "far")))
-        AS ?distanceToken)
-WHERE {
-  ?ward1 a yago:OS_MetropolitanDistrictWard ;
-         geo:hasGeometry/geo:asWKT ?wkt1 .
-  ?ward2 a yago:OS_MetropolitanDistrictWard ;
-         geo:hasGeometry/geo:asWKT ?wkt2 .
-  FILTER(str(?ward1) < str(?ward2))
-  BIND(geof:distance(?wkt1, ?wkt2, uom:metre) AS ?dist)
-}
-""")
-try:
-    result = sparql.queryAndConvert()
-except Exception as e:
-    print("[ERROR] SPARQL query failed:", e, file=sys.stderr)
-    sys.exit(1)
-rows = []
-for b in result["results"]["bindings"]:
-    rows.append({
-        "ward1": b["ward1"]["value"],
-        "ward2": b["ward2"]["value"],
-        "distance_m": float(b["dist"]["value"]),
-        "relation": b["distanceToken"]["value"]
+def extract(client, max_band=MAX_BAND, full=FORCE_FULL):
+    wards, geoms = load_geometries(client, "OS_MetropolitanDistrictWard")
+    # Sort by URI so i < j matches the former str(?ward1) < str(?ward2) filter
+    order = np.argsort(wards.astype(str), kind="stable")
+    wards, geoms = wards[order], geoms[order]
+    names = clean_uris(wards)
+
+    # The projection origin is kept from the previous run so that recomputed
+    # distances agree with the rows that are reused
+    delta = plan(OUTPUT_PATH, wards, names, geoms, key={"max_band": max_band, "metric": "great_circle"},
+                 state={"lat0": mean_latitude(geoms)}, full=full)
+    lat0 = delta.state["lat0"]
+    overstatement = max_overstatement(geoms, lat0)
+    geoms = to_metres(geoms, lat0=lat0)
+    i, j = candidate_pairs(geoms, max_band, delta, overstatement)
+    dist = pair_distances(geoms, i, j, lat0)
+    if max_band != "far":
+        within = dist <= band_limit(max_band)
+        i, j, dist = i[within], j[within], dist[within]
+
+    df_out = pd.DataFrame({
+        "place1": names[i],
+        "place2": names[j],
+        "relation": distance_tokens(dist),
+        "distance_m": dist
     })
-def clean_uri(uri):
-    name = uri.rsplit("/", 1)[-1]
-    name = re.sub(r'^(geoentity_|osentity_)', '', name)
-    name = re.sub(r'_[0-9]+$', '', name)
-    name = re.sub(r'[_\,]', ' ', name)
-    name = re.sub(r'\bWard$', '', name)
-    return re.sub(r'\s+', ' ', name).strip()
+    return delta.merge(df_out, np.c_[i, j]), delta
+
+def run(client, full=FORCE_FULL):
+    # Extract and write OUTPUT_PATH; returns the number of rows written
+    df_out, delta = extract(client, full=full)
+    print(f"[INFO] {delta.summary()}")
+    write_table(df_out, OUTPUT_PATH)
+    save_pair_matrices(os.path.dirname(OUTPUT_PATH), "dis", delta.names, df_out)
+    delta.save()
+    return len(df_out)
 
-df = pd.DataFrame(rows)
-df["place1"] = df["ward1"].apply(clean_uri)
-df["place2"] = df["ward2"].apply(clean_uri)
+def main():
+    try:
+        run(SparqlClient(GRAPHDB_ENDPOINT))
+    except Exception as e:
+        print("[ERROR] SPARQL query failed:", e, file=sys.stderr)
+        sys.exit(1)
 
-df_out = df[["place1", "place2", "relation", "distance_m"]].copy()
-os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-df_out.to_csv(OUTPUT_PATH, index=False, encoding="utf-8")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,369 @@
+"""
+Evaluate a model on the merged GeoBenchmark files through an OpenAI-compatible
+HTTP endpoint.
+Questions are streamed from the merged MCQ and Yes/No tables into a bounded
+queue. `concurrency` asyncio workers each keep one request in flight, sending
+up to `batch_size` prompts per /completions request (one per
+/chat/completions request); failed requests are retried with exponential
+backoff. Every answer is appended to a JSONL results log, so an interrupted
+run resumes with the questions that are still missing. Responses are cached
+by request key (normalized prompt, model, decoding parameters), so a prompt
+repeated across subsets, runs or regenerated benchmarks reaches the model
+once per configuration. mockllm.py serves a deterministic stand-in model for
+offline runs.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+
+import benchmarkmerge
+from localcache import LocalCache
+from tables import find_table, iter_table
+
+BASE_DIR = os.path.join("..", "geodata", "results")
+ENDPOINT = os.getenv("EVAL_ENDPOINT", "http://localhost:8000/v1")
+API_KEY = os.getenv("EVAL_API_KEY", os.getenv("OPENAI_API_KEY", ""))
+CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "32"))
+BATCH_SIZE = int(os.getenv("EVAL_BATCH_SIZE", "8"))
+REQUEST_TIMEOUT = float(os.getenv("EVAL_TIMEOUT", "120"))
+MAX_RETRIES = 5
+BACKOFF_MAX = 30.0
+READ_CHUNK = 1000
+MERGED = {"mcq": benchmarkmerge.MCQ_OUTPUT, "yesno": benchmarkmerge.YESNO_OUTPUT}
+INSTRUCTIONS = {"mcq": "Answer with the letter of the correct option only.",
+                "yesno": "Answer with Yes or No only."}
+ANSWERS = {"mcq": re.compile(r"\b([ABC])\b"), "yesno": re.compile(r"\b(yes|no)\b", re.IGNORECASE)}
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+META_COLUMNS = ["concept", "dir", "dis", "top"]
+USE_CACHE = os.getenv("GEOBENCH_NO_CACHE") is None
+RESPONSE_CACHE = LocalCache("responses")
+
+def _aiohttp():
+    try:
+        import aiohttp
+    except ImportError as e:
+        raise ImportError("Evaluation needs aiohttp (pip install aiohttp)") from e
+    return aiohttp
+
+def build_prompt(kind, row):
+    parts = [row["question"]] + ([row["options"]] if kind == "mcq" else [])
+    return "\n".join(parts + [INSTRUCTIONS[kind]])
+
+def expected(kind, answer):
+    # "B. Wetherby" -> "B"; "Yes" -> "Yes"
+    return answer.split(".", 1)[0].strip() if kind == "mcq" else answer.strip()
+
+def parse_answer(kind, text):
+    m = ANSWERS[kind].search(text or "")
+    if m is None:
+        return None
+    return m.group(1).upper() if kind == "mcq" else m.group(1).capitalize()
+
+def normalize_prompt(prompt):
+    # Whitespace-insensitive form of a prompt, used for request keys
+    return "\n".join(" ".join(line.split()) for line in prompt.strip().splitlines())
+
+def questions(kinds, base_dir=BASE_DIR):
+    # Yields one dict per benchmark row; ids are "<kind>:<row number>"
+    for kind in kinds:
+        path = find_table(os.path.join(base_dir, MERGED[kind]))
+        if path is None:
+            raise FileNotFoundError(f"No merged {kind} file in {base_dir}; run benchmarkmerge.py first")
+        n = 0
+        for chunk in iter_table(path, READ_CHUNK, keep_default_na=False):
+            for row in chunk.to_dict("records"):
+                yield {"id": f"{kind}:{n}", "kind": kind, "prompt": build_prompt(kind, row),
+                       "answer": expected(kind, str(row["answer"])),
+                       **{c: row[c] for c in META_COLUMNS if c in row}}
+                n += 1
+
+class RetryableError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class ModelClient:
+    # One aiohttp session with at most `concurrency` connections to the endpoint
+    def __init__(self, endpoint, model, api="completions", max_tokens=8, temperature=0.0,
+                 concurrency=CONCURRENCY, api_key=API_KEY, retries=MAX_RETRIES,
+                 timeout=REQUEST_TIMEOUT):
+        self.aiohttp = _aiohttp()
+        self.endpoint, self.model, self.api = endpoint.rstrip("/"), model, api
+        self.params = {"max_tokens": max_tokens, "temperature": temperature}
+        self.concurrency, self.api_key = concurrency, api_key
+        self.retries, self.timeout = retries, timeout
+        self.session = None
+
+    def key(self, prompt):
+        # Identifies a request: normalized prompt, model, API and decoding
+        # parameters; the same for any endpoint serving the model
+        doc = {"prompt": normalize_prompt(prompt), "model": self.model, "api": self.api, **self.params}
+        return hashlib.sha256(json.dumps(doc, sort_keys=True).encode("utf-8")).hexdigest()
+
+    async def __aenter__(self):
+        aiohttp = self.aiohttp
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        self.session = aiohttp.ClientSession(
+            headers=headers, connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def _post(self, path, body):
+        aiohttp = self.aiohttp
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.session.post(self.endpoint + path, json=body) as r:
+                    if r.status in RETRY_STATUS:
+                        retry_after = r.headers.get("Retry-After")
+                        raise RetryableError(f"HTTP {r.status}",
+                                             float(retry_after) if retry_after else None)
+                    r.raise_for_status()
+                    return await r.json()
+            except (RetryableError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                    asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise
+                delay = getattr(e, "retry_after", None) or \
+                    min(BACKOFF_MAX, 2 ** attempt) * random.uniform(0.5, 1.0)
+                print(f"[WARN] Request failed ({e or type(e).__name__}); retrying in {delay:.1f}s",
+                      file=sys.stderr)
+                await asyncio.sleep(delay)
+
+    async def complete(self, prompts):
+        # Response text per prompt; /chat/completions takes a single prompt
+        if self.api == "chat":
+            (prompt,) = prompts
+            body = {"model": self.model, "messages": [{"role": "user", "content": prompt}], **self.params}
+            return [(await self._post("/chat/completions", body))["choices"][0]["message"]["content"]]
+        body = {"model": self.model, "prompt": list(prompts), **self.params}
+        choices = sorted((await self._post("/completions", body))["choices"], key=lambda c: c["index"])
+        return [c["text"] for c in choices]
+
+class ResponseCache:
+    # Responses by request key: this run's in memory, earlier ones on a
+    # LocalCache (`store`, None to disable), plus the requests in flight,
+    # which identical ones wait for
+    def __init__(self, store=RESPONSE_CACHE):
+        self.store, self.memory, self.pending = store, {}, {}
+
+    def _read(self, keys):
+        found = {}
+        for key in keys:
+            path = self.store.get(key, ".json")
+            if path is None:
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    found[key] = json.load(f)["response"]
+            except (OSError, ValueError, KeyError):
+                # Evicted in the meantime or unreadable; ask the model again
+                continue
+        return found
+
+    def _write(self, responses):
+        for key, text in responses.items():
+            def write(tmp, text=text):
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"response": text}, f)
+            self.store.put(key, ".json", write, evict=False)
+
+    async def lookup(self, keys):
+        found = {k: self.memory[k] for k in keys if k in self.memory}
+        rest = [k for k in keys if k not in found]
+        if self.store and rest:
+            found.update(await asyncio.to_thread(self._read, rest))
+        return found
+
+    async def save(self, responses):
+        self.memory.update(responses)
+        if self.store and responses:
+            await asyncio.to_thread(self._write, responses)
+
+    async def evict(self):
+        if self.store:
+            await asyncio.to_thread(self.store.evict)
+
+def load_log(path):
+    # {id: record} of the answered questions in a results log (last record
+    # wins); a line cut off by a crash is dropped from the file
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+    for line in data[:end].splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if "error" in record:
+            records.pop(record["id"], None)
+        else:
+            records[record["id"]] = record
+    return records
+
+def result_record(item, key, model, text):
+    prediction = parse_answer(item["kind"], text)
+    return {"id": item["id"], "key": key, "model": model, "response": text,
+            "prediction": prediction, "answer": item["answer"],
+            "correct": prediction == item["answer"],
+            **{c: item[c] for c in META_COLUMNS if c in item}}
+
+async def answer(client, cache, batch):
+    # {key: response} for a batch of (item, key); only distinct keys that are
+    # neither cached nor in flight are sent. Keys whose identical in-flight
+    # request failed are missing. Returns the number of prompts sent as well.
+    prompts = {}
+    for item, key in batch:
+        prompts.setdefault(key, item["prompt"])
+    texts = await cache.lookup([k for k in prompts if k not in cache.pending])
+    waiting = {k: cache.pending[k] for k in prompts if k not in texts and k in cache.pending}
+    send = [k for k in prompts if k not in texts and k not in waiting]
+    loop = asyncio.get_running_loop()
+    for k in send:
+        cache.pending[k] = loop.create_future()
+    try:
+        sent = await client.complete([prompts[k] for k in send]) if send else []
+        fresh = dict(zip(send, sent, strict=True))
+    except Exception:
+        for k in send:
+            cache.pending.pop(k).set_result(None)
+        raise
+    for k, text in fresh.items():
+        cache.pending.pop(k).set_result(text)
+    await cache.save(fresh)
+    texts.update(fresh)
+    for k, future in waiting.items():
+        if (text := await future) is not None:
+            texts[k] = text
+    return texts, len(send)
+
+async def run(client, items, log_path, concurrency=CONCURRENCY, batch_size=BATCH_SIZE, cache=None):
+    # Answers every item whose key is not in the log yet; returns counts
+    done = {i: r["key"] for i, r in load_log(log_path).items()}
+    os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+    cache = cache or ResponseCache(None)
+    counts = {"answered": 0, "sent": 0, "failed": 0, "resumed": 0}
+    queue = asyncio.Queue(maxsize=concurrency * batch_size * 2)
+
+    async def produce():
+        for item in items:
+            key = client.key(item["prompt"])
+            if done.get(item["id"]) == key:
+                counts["resumed"] += 1
+                continue
+            await queue.put((item, key))
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def work(log):
+        while (first := await queue.get()) is not None:
+            batch = [first]
+            while len(batch) < batch_size:
+                try:
+                    nxt = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if nxt is None:
+                    queue.put_nowait(None)
+                    break
+                batch.append(nxt)
+            try:
+                texts, sent = await answer(client, cache, batch)
+                counts["sent"] += sent
+                error = "identical request failed"
+            except Exception as e:
+                print(f"[WARN] {len(batch)} questions failed: {e}", file=sys.stderr)
+                texts, error = {}, str(e)
+            records = []
+            for item, key in batch:
+                if key in texts:
+                    records.append(result_record(item, key, client.model, texts[key]))
+                    counts["answered"] += 1
+                else:
+                    records.append({"id": item["id"], "key": key, "model": client.model, "error": error})
+                    counts["failed"] += 1
+            log.write("".join(json.dumps(r) + "\n" for r in records))
+            log.flush()
+
+    with open(log_path, "a", encoding="utf-8") as log:
+        await asyncio.gather(produce(), *(work(log) for _ in range(concurrency)))
+    await cache.evict()
+    return counts
+
+def summarize(log_path):
+    # {kind: {"n", "correct", "by_concept": {level: [n, correct]}}}
+    summary = {}
+    for record in load_log(log_path).values():
+        kind = record["id"].split(":", 1)[0]
+        s = summary.setdefault(kind, {"n": 0, "correct": 0, "by_concept": {}})
+        s["n"] += 1
+        s["correct"] += record["correct"]
+        level = s["by_concept"].setdefault(str(record.get("concept", "?")), [0, 0])
+        level[0] += 1
+        level[1] += record["correct"]
+    return summary
+
+async def evaluate(model, kinds, base_dir, log_path, endpoint=ENDPOINT, api="completions",
+                   concurrency=CONCURRENCY, batch_size=BATCH_SIZE, limit=None, use_cache=USE_CACHE,
+                   **params):
+    items = questions(kinds, base_dir)
+    if limit is not None:
+        items = (item for item, _ in zip(items, range(limit)))
+    async with ModelClient(endpoint, model, api, concurrency=concurrency, **params) as client:
+        return await run(client, items, log_path, concurrency, 1 if api == "chat" else batch_size,
+                         ResponseCache(RESPONSE_CACHE if use_cache else None))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a model on GeoBenchmark via an OpenAI-compatible API")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--endpoint", default=ENDPOINT, help="base URL, e.g. http://localhost:8000/v1")
+    parser.add_argument("--api", choices=["completions", "chat"], default="completions",
+                        help="completions batches prompts; chat sends one per request")
+    parser.add_argument("--kinds", nargs="+", choices=list(MERGED), default=list(MERGED))
+    parser.add_argument("--results-dir", default=BASE_DIR, help="directory with the merged files")
+    parser.add_argument("--log", help="results log (default: <results-dir>/eval/<model>.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="requests in flight")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="prompts per request")
+    parser.add_argument("--max-tokens", type=int, default=8)
+    parser.add_argument("--temperature", type=float, default=0.0)
+    parser.add_argument("--limit", type=int, help="only the first N questions")
+    parser.add_argument("--no-cache", action="store_true", default=not USE_CACHE,
+                        help="do not read or store cached responses")
+    args = parser.parse_args(argv)
+
+    log_path = args.log or os.path.join(args.results_dir, "eval",
+                                        re.sub(r"[^\w.-]+", "_", args.model) + ".jsonl")
+    start = time.perf_counter()
+    try:
+        counts = asyncio.run(evaluate(
+            args.model, args.kinds, args.results_dir, log_path, args.endpoint, args.api,
+            args.concurrency, args.batch_size, args.limit, not args.no_cache,
+            max_tokens=args.max_tokens, temperature=args.temperature))
+    except (OSError, ImportError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"[INFO] {counts['answered']} answered ({counts['sent']} sent to the model, the rest "
+          f"cached or duplicates), {counts['failed']} failed, "
+          f"{counts['resumed']} already in {log_path}; {elapsed:.1f}s "
+          f"({counts['answered'] / max(elapsed, 1e-9):.0f} questions/s)")
+    for kind, s in summarize(log_path).items():
+        levels = ", ".join(f"concept {level}: {c / n:.3f}" for level, (n, c) in sorted(s["by_concept"].items()))
+        print(f"[INFO] {kind}: accuracy {s['correct'] / s['n']:.3f} over {s['n']} ({levels})")
+    return 1 if counts["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
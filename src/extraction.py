@@ -0,0 +1,186 @@
+# Paginated, resumable SPARQL extraction shared by the relation extractors
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from localcache import LocalCache
+
+GRAPHDB_ENDPOINT = os.getenv("GRAPHDB_ENDPOINT", "http://localhost:7200/repositories/yago")
+PAGE_SIZE = int(os.getenv("SPARQL_PAGE_SIZE", "10000"))
+# Upper bound on concurrent requests (and pooled connections) per endpoint
+MAX_CONNECTIONS = int(os.getenv("SPARQL_MAX_CONNECTIONS", "4"))
+REQUEST_TIMEOUT = float(os.getenv("SPARQL_TIMEOUT", "600"))
+STAGING_DIR = os.getenv("EXTRACT_STAGING_DIR", "./results/relations/.staging")
+MAX_RETRIES = 3
+# Part of every cache key; bump when a new YAGO2geo dump is loaded
+DATASET_VERSION = os.getenv("YAGO_DATASET_VERSION", "yago2geo-uk")
+USE_CACHE = os.getenv("GEOBENCH_NO_CACHE") is None
+SPARQL_CACHE = LocalCache("sparql")
+
+class SparqlClient:
+    # SPARQL-over-HTTP on one keep-alive requests.Session; safe to share
+    # between threads, with a semaphore capping in-flight requests
+    def __init__(self, endpoint=GRAPHDB_ENDPOINT, max_connections=MAX_CONNECTIONS):
+        self.endpoint = endpoint
+        self.session = requests.Session()
+        # Disable proxy interference
+        self.session.trust_env = False
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    @contextmanager
+    def select_csv(self, query):
+        # Raw byte stream of the SPARQL CSV results of `query`
+        with self._slots:
+            response = self.session.post(
+                self.endpoint, data={"query": query},
+                headers={"Accept": "text/csv"}, stream=True, timeout=REQUEST_TIMEOUT)
+            try:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                # Let io.TextIOWrapper see EOF instead of a closed stream
+                response.raw.auto_close = False
+                yield response.raw
+            finally:
+                response.close()
+
+    def close(self):
+        self.session.close()
+
+_locks_guard = threading.Lock()
+_locks = defaultdict(threading.Lock)
+
+def key_lock(*key):
+    # One lock per key, so concurrent stages asking for the same data
+    # fetch it once and the others wait for the cached copy
+    with _locks_guard:
+        return _locks[key]
+
+def query_key(client, query):
+    return LocalCache.key(client.endpoint, query, DATASET_VERSION)
+
+def _read_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+def _stream_page(client, query, f, columns):
+    # Parse the SPARQL CSV results row by row straight into the staging file;
+    # no per-binding dicts are built. Returns the number of rows written.
+    with client.select_csv(query) as stream:
+        reader = csv.reader(io.TextIOWrapper(stream, encoding="utf-8", newline=""))
+        header = next(reader, None)
+        if header is None:
+            return 0
+        idx = [header.index(c) for c in columns]
+        writer = csv.writer(f)
+        n = 0
+        for row in reader:
+            writer.writerow([row[k] for k in idx])
+            n += 1
+        return n
+
+def _fetch_page(client, query, out_path, columns, retries=MAX_RETRIES):
+    start = os.path.getsize(out_path)
+    for attempt in range(retries + 1):
+        try:
+            with open(out_path, "a", newline="", encoding="utf-8") as f:
+                return _stream_page(client, query, f, columns)
+        except Exception as e:
+            # Discard the partially written page before retrying
+            with open(out_path, "r+b") as f:
+                f.truncate(start)
+            if attempt == retries:
+                raise
+            wait = 2 ** attempt
+            print(f"[WARN] SPARQL page failed ({e}); retrying in {wait}s", file=sys.stderr)
+            time.sleep(wait)
+
+# Page through `query` in a stable order, appending each page to
+# STAGING_DIR/<name>.csv. A checkpoint next to the file records the next
+# offset, so an interrupted run resumes from the last completed page.
+# Pages are ordered by the `order_by` columns (all columns by default); pass the
+# columns identifying a row so the endpoint never sorts on bulky values
+# such as WKT literals.
+def paged_select(client, query, columns, name, page_size=PAGE_SIZE, order_by=None):
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    out_path = os.path.join(STAGING_DIR, f"{name}.csv")
+    checkpoint_path = out_path + ".checkpoint"
+    order = " ".join(f"?{c}" for c in (order_by or columns))
+    query_hash = hashlib.sha256(f"{query}\nORDER BY {order}".encode("utf-8")).hexdigest()
+
+    state = _read_checkpoint(checkpoint_path)
+    if state and state["query"] == query_hash and os.path.exists(out_path):
+        # Drop anything appended after the last recorded page
+        with open(out_path, "r+b") as f:
+            f.truncate(state["size"])
+        offset = state["offset"]
+        print(f"[INFO] Resuming {name} from offset {offset}")
+    else:
+        with open(out_path, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(columns)
+        offset = 0
+
+    while True:
+        page = f"{query}\nORDER BY {order}\nLIMIT {page_size}\nOFFSET {offset}"
+        n = _fetch_page(client, page, out_path, columns)
+        offset += n
+        _write_checkpoint(checkpoint_path, {
+            "query": query_hash, "offset": offset, "size": os.path.getsize(out_path)})
+        if n < page_size:
+            break
+
+    os.remove(checkpoint_path)
+    return out_path
+
+def cached_select(client, query, columns, name, page_size=PAGE_SIZE, order_by=None):
+    # Path of the (gzip) bindings CSV for `query`, fetched only on a cache miss
+    key = query_key(client, query)
+    with key_lock("sparql", key):
+        path = SPARQL_CACHE.get(key, ".csv.gz") if USE_CACHE else None
+        if path:
+            print(f"[INFO] Cache hit for {name} ({key[:12]})")
+            return path
+        staged = paged_select(client, query, columns, name, page_size, order_by)
+        if not USE_CACHE:
+            return staged
+
+        def write(tmp):
+            with open(staged, "rb") as src, gzip.open(tmp, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+        path = SPARQL_CACHE.put(key, ".csv.gz", write)
+        # An entry larger than the whole cache budget is evicted straight away
+        return path if os.path.exists(path) else staged
+
+def iter_select(client, query, columns, name, dtypes=None, page_size=PAGE_SIZE,
+                order_by=None, chunk_size=PAGE_SIZE):
+    # cached_select, then read the bindings back as DataFrames of up to
+    # `chunk_size` rows with typed columns (str by default); the whole result
+    # is never held in memory at once
+    path = cached_select(client, query, columns, name, page_size, order_by)
+    dtypes = {c: (dtypes or {}).get(c, str) for c in columns}
+    with pd.read_csv(path, dtype=dtypes, keep_default_na=False, chunksize=chunk_size) as reader:
+        yield from reader
\ No newline at end of file
@@ -0,0 +1,102 @@
+# Shared geometry retrieval and parsing for the relation extractors
+import numpy as np
+import shapely
+
+from extraction import USE_CACHE, iter_select, key_lock, query_key
+from localcache import LocalCache
+
+GEOMETRY_QUERY = """
+PREFIX geo: <http://www.opengis.net/ont/geosparql#>
+PREFIX yago: <http://kr.di.uoa.gr/yago2geo/ontology/>
+SELECT ?place ?wkt WHERE {{
+  ?place a yago:{cls} ; geo:hasGeometry/geo:asWKT ?wkt .
+}}
+"""
+
+# Mean Earth radius (m) of the sphere distances are measured on
+EARTH_RADIUS_M = 6371008.8
+GEOMETRY_CACHE = LocalCache("geometries")
+
+def clean_wkt(wkt_str):
+    if wkt_str.startswith("<"):
+        return " ".join(wkt_str.split()[1:])
+    return wkt_str
+
+def fetch_geometries(client, cls):
+    # (URIs, parsed geometries) per chunk of the class's bindings, one row per
+    # entity (its first WKT) and unparseable rows dropped; only one chunk of
+    # WKT text is in memory at a time
+    seen = set()
+    for df in iter_select(client, GEOMETRY_QUERY.format(cls=cls), ["place", "wkt"], cls,
+                          order_by=["place"]):
+        df = df[~df["place"].isin(seen)].drop_duplicates(subset="place")
+        seen.update(df["place"])
+        geoms = parse_geometries(df["wkt"])
+        valid = ~shapely.is_missing(geoms)
+        yield df["place"].to_numpy()[valid], geoms[valid]
+
+def parse_geometries(wkts):
+    # Vectorized WKT parsing; unparseable or empty geometries become None
+    geoms = shapely.from_wkt([clean_wkt(w) for w in wkts], on_invalid="ignore")
+    geoms[shapely.is_missing(geoms) | shapely.is_empty(geoms)] = None
+    return geoms
+
+def _save_geometries(path, places, geoms):
+    # Places plus concatenated WKB with offsets; loads without pickle
+    wkbs = shapely.to_wkb(geoms).tolist()
+    offsets = np.cumsum([0] + [len(b) for b in wkbs])
+    with open(path, "wb") as f:
+        np.savez(f, places=np.array(places, dtype=str),
+                 wkb=np.frombuffer(b"".join(wkbs), dtype=np.uint8), offsets=offsets)
+
+def _load_geometries(path):
+    with np.load(path) as data:
+        places, wkb, offsets = data["places"], data["wkb"].tobytes(), data["offsets"]
+    wkbs = [wkb[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+    return places.astype(object), shapely.from_wkb(wkbs)
+
+def load_geometries(client, cls):
+    # (URIs, parsed geometries) of a class, without unparseable rows;
+    # served from the WKB cache when the same query was parsed before
+    key = query_key(client, GEOMETRY_QUERY.format(cls=cls))
+    with key_lock("geometries", key):
+        path = GEOMETRY_CACHE.get(key, ".npz") if USE_CACHE else None
+        if path:
+            return _load_geometries(path)
+        chunks = list(fetch_geometries(client, cls))
+        places = np.concatenate([p for p, _ in chunks] + [np.empty(0, dtype=object)])
+        geoms = np.concatenate([g for _, g in chunks] + [np.empty(0, dtype=object)])
+        if USE_CACHE:
+            GEOMETRY_CACHE.put(key, ".npz", lambda tmp: _save_geometries(tmp, places, geoms))
+        return places, geoms
+
+def mean_latitude(geoms):
+    return float(np.nanmean(shapely.get_y(shapely.centroid(geoms))))
+
+def metre_scale(lat0):
+    # Metres per degree of longitude and of latitude at lat0
+    return EARTH_RADIUS_M * np.cos(np.radians(lat0)) * np.pi / 180, EARTH_RADIUS_M * np.pi / 180
+
+def to_metres(geoms, lat0=None):
+    # Equirectangular projection around lat0 (default: mean centroid latitude),
+    # for spatial indexing and finding closest points. East-west lengths are
+    # off by up to a few percent away from lat0, so distances are measured
+    # with great_circle_m instead.
+    if lat0 is None:
+        lat0 = mean_latitude(geoms)
+    kx, ky = metre_scale(lat0)
+    return shapely.transform(geoms, lambda xy: xy * [kx, ky])
+
+def max_overstatement(geoms, lat0):
+    # Largest factor by which to_metres(geoms, lat0) lengthens a distance:
+    # east-west lengths grow by cos(lat0) / cos(lat) poleward of lat0
+    _, ymin, _, ymax = shapely.total_bounds(geoms)
+    lat = max(abs(ymin), abs(ymax))
+    return max(1.0, np.cos(np.radians(lat0)) / np.cos(np.radians(lat)))
+
+def great_circle_m(lon1, lat1, lon2, lat2):
+    # Haversine distance (m) on the mean-radius sphere
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + \
+        np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arctan2(np.sqrt(np.minimum(h, 1)), np.sqrt(np.maximum(1 - h, 0)))
\ No newline at end of file
@@ -0,0 +1,176 @@
+# Incremental re-extraction: per-entity geometry hashes stored next to each
+# relation CSV decide which pairs have to be recomputed on the next run
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from tables import find_table, read_table
+
+# Set to force a full recomputation even when a manifest exists
+FORCE_FULL = os.getenv("EXTRACT_FULL") is not None
+
+def manifest_path(output_path):
+    return output_path + ".entities.json"
+
+def row_keys_path(output_path):
+    # Sort key of every output row, entity columns indexing the manifest's entities
+    return output_path + ".rows.npy"
+
+def discard_manifest(output_path):
+    # For outputs written by a non-incremental path: the next incremental run
+    # must not reuse them as its own previous output
+    for path in (manifest_path(output_path), row_keys_path(output_path)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def load_row_keys(output_path, digest):
+    # Row keys saved with the manifest whose "row_keys" digest is `digest`;
+    # None when missing or from another run
+    try:
+        keys = np.load(row_keys_path(output_path))
+    except (OSError, ValueError):
+        return None
+    return keys if hashlib.sha1(keys.tobytes()).hexdigest() == digest else None
+
+def geometry_hashes(geoms):
+    return [hashlib.sha1(b).hexdigest() for b in shapely.to_wkb(geoms).tolist()]
+
+class Delta:
+    # What changed since the last run. `full` means no usable previous
+    # output; otherwise only pairs touching `affected` entities are recomputed
+    # and rows naming a `stale` place are dropped from the old output.
+    def __init__(self, output_path, places, names, hashes, key, state, full,
+                 affected=None, stale=(), previous_places=(), previous_keys=None,
+                 changed=0, removed=0):
+        self.output_path = output_path
+        self.places, self.names, self.hashes = places, names, hashes
+        self.key, self.state = key, state
+        self.full = full
+        self.affected = affected
+        self.stale = set(stale)
+        # Entities new or changed / gone since the previous run
+        self.changed, self.removed = changed, removed
+        # Row keys of the previous output and the entity order they index
+        self.previous_places = list(previous_places)
+        self.previous_keys = previous_keys
+        self.row_keys = None
+
+    def pairs(self, ordered):
+        # Index pairs (i, j) with i or j affected, in row-major order:
+        # all i != j when ordered, otherwise i < j. O(k * N) for k affected.
+        n = len(self.names)
+        if self.full:
+            if ordered:
+                return np.nonzero(~np.eye(n, dtype=bool))
+            return np.triu_indices(n, k=1)
+        a = np.flatnonzero(self.affected)
+        i, j = np.repeat(a, n), np.tile(np.arange(n), len(a))
+        if ordered:
+            rest = np.flatnonzero(~self.affected)
+            i = np.concatenate([i, np.repeat(rest, len(a))])
+            j = np.concatenate([j, np.tile(a, len(rest))])
+            keep = i != j
+        else:
+            i, j = np.minimum(i, j), np.maximum(i, j)
+            keep = i < j
+        pair_ids = np.unique(i[keep] * n + j[keep])
+        return pair_ids // n, pair_ids % n
+
+    def summary(self):
+        # One line for the extractors to report
+        name = os.path.basename(self.output_path)
+        if self.full:
+            return f"{name}: full extraction of {len(self.names)} entities"
+        return (f"{name}: {self.changed} new/changed, {self.removed} removed, "
+                f"recomputing pairs for {int(self.affected.sum())} entities")
+
+    def _previous_keys(self, rows, entity_cols):
+        # Row keys of the previous output, entity columns renumbered to the
+        # current entities (negative values are not entity indices)
+        keys = self.previous_keys.copy()
+        if len(keys) != rows:
+            raise ValueError(f"{self.output_path} does not match its saved row keys; "
+                             "re-run with EXTRACT_FULL=1")
+        ids = {p: i for i, p in enumerate(self.places)}
+        remap = np.array([ids.get(p, -1) for p in self.previous_places], dtype=np.int64)
+        for c in entity_cols:
+            keys[:, c] = np.where(keys[:, c] >= 0, remap[np.maximum(keys[:, c], 0)], keys[:, c])
+        return keys
+
+    def merge(self, new_df, keys, entity_cols=(0, 1)):
+        # Previous rows that do not involve a stale place, plus the recomputed
+        # ones, in the canonical order of a full run. `keys` holds one sort key
+        # per new row, most significant column first, with entity indices in
+        # `entity_cols`: names cannot order rows, since distinct entities can
+        # share a cleaned name.
+        keys = np.asarray(keys, dtype=np.int64).reshape(len(new_df), -1)
+        if not self.full:
+            old = read_table(self.output_path, float_precision="round_trip")
+            # Parquet place columns come back categorical; new places must fit
+            old = old.astype({c: object for c, t in old.dtypes.items()
+                              if isinstance(t, pd.CategoricalDtype)})
+            keep = ~(old["place1"].isin(self.stale) | old["place2"].isin(self.stale)).to_numpy()
+            old_keys = self._previous_keys(len(old), entity_cols)[keep]
+            new_df = pd.concat([old[keep], new_df.astype(old.dtypes.to_dict())],
+                               ignore_index=True)
+            keys = np.concatenate([old_keys, keys])
+        order = np.lexsort(keys.T[::-1])
+        self.row_keys = keys[order]
+        return new_df.iloc[order].reset_index(drop=True)
+
+    def save(self):
+        # After the merged output is written. The manifest records a digest of
+        # the row keys, so a crash between the two files forces a full rerun.
+        tmp = f"{row_keys_path(self.output_path)}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, self.row_keys)
+        os.replace(tmp, row_keys_path(self.output_path))
+        with open(manifest_path(self.output_path), "w", encoding="utf-8") as f:
+            json.dump({
+                "key": self.key,
+                "state": self.state,
+                "row_keys": hashlib.sha1(self.row_keys.tobytes()).hexdigest(),
+                "entities": [[p, str(n), h] for p, n, h in zip(self.places, self.names, self.hashes)]
+            }, f)
+
+def plan(output_path, places, names, geoms, key=None, state=None, full=FORCE_FULL):
+    # Compare the current entities with the manifest of the previous run.
+    # A different `key` (settings that change every row) forces a full run;
+    # `state` (e.g. a projection origin) is taken from the previous run so the
+    # recomputed pairs stay consistent with the rows that are kept.
+    places = [str(p) for p in places]
+    names = np.asarray(names, dtype=object)
+    hashes = geometry_hashes(geoms)
+    key, state = dict(key or {}), dict(state or {})
+    previous = None
+    if not full and find_table(output_path) is not None:
+        try:
+            with open(manifest_path(output_path), encoding="utf-8") as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = None
+    previous_keys = None
+    if previous is not None:
+        previous_keys = load_row_keys(output_path, previous.get("row_keys"))
+    if previous_keys is None or previous["key"] != key:
+        return Delta(output_path, places, names, hashes, key, state, full=True)
+
+    old = {p: (n, h) for p, n, h in previous["entities"]}
+    current = dict(zip(places, hashes))
+    changed = {p for p, h in current.items() if p not in old or old[p][1] != h}
+    removed = set(old) - set(current)
+    # Every place name touched by a change; entities sharing such a name are
+    # recomputed too, since their rows cannot be told apart by name
+    stale = {old[p][0] for p in changed | removed if p in old}
+    stale |= {n for p, n in zip(places, names) if p in changed}
+    affected = np.array([n in stale for n in names], dtype=bool)
+    return Delta(output_path, places, names, hashes, key, previous["state"],
+                 full=False, affected=affected, stale=stale,
+                 previous_places=[p for p, _, _ in previous["entities"]],
+                 previous_keys=previous_keys, changed=len(changed), removed=len(removed))
\ No newline at end of file
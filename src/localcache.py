@@ -0,0 +1,109 @@
+# Content-addressed on-disk cache with size-based (least recently used) eviction
+import argparse
+import hashlib
+import os
+import sys
+import threading
+
+CACHE_DIR = os.getenv("GEOBENCH_CACHE_DIR", os.path.expanduser("~/.cache/geobenchmark"))
+CACHE_MAX_BYTES = int(os.getenv("GEOBENCH_CACHE_MAX_BYTES", str(4 * 1024 ** 3)))
+# Namespaces whose entries are derived from another's and share its keys
+# (geometry.py parses cached SPARQL results under the same query key), so
+# invalidating the source must drop them too
+DERIVED_NAMESPACES = {"sparql": ("geometries",)}
+
+class LocalCache:
+    def __init__(self, namespace, root=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.root = os.path.join(root, namespace)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(*parts):
+        h = hashlib.sha256()
+        for part in parts:
+            h.update(str(part).encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def path(self, key, suffix=""):
+        return os.path.join(self.root, key[:2], key + suffix)
+
+    def get(self, key, suffix=""):
+        # Path of the cached entry, or None; a hit refreshes its recency
+        path = self.path(key, suffix)
+        if not os.path.exists(path):
+            return None
+        os.utime(path)
+        return path
+
+    def put(self, key, suffix, write, evict=True):
+        # `write(tmp_path)` produces the entry; it is published atomically.
+        # Callers storing many small entries pass evict=False and call evict()
+        # once afterwards, since it scans the whole namespace
+        path = self.path(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        if evict:
+            self.evict()
+        return path
+
+    def entries(self):
+        if not os.path.isdir(self.root):
+            return []
+        out = []
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, name)
+                st = os.stat(path)
+                out.append((st.st_mtime, st.st_size, path))
+        return out
+
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def invalidate(self, prefixes=None):
+        # Remove every entry, or those whose key starts with one of `prefixes`
+        removed = 0
+        for _, _, path in self.entries():
+            name = os.path.basename(path)
+            if not prefixes or any(name.startswith(p) for p in prefixes):
+                os.remove(path)
+                removed += 1
+        return removed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or invalidate the GeoBenchmark local cache")
+    parser.add_argument("command", choices=["stats", "invalidate"])
+    parser.add_argument("namespace", help="cache namespace, e.g. sparql")
+    parser.add_argument("keys", nargs="*", help="key prefixes to invalidate (default: all)")
+    args = parser.parse_args(argv)
+
+    cache = LocalCache(args.namespace)
+    if args.command == "stats":
+        entries = cache.entries()
+        total = sum(size for _, size, _ in entries)
+        print(f"[INFO] {cache.root}: {len(entries)} entries, {total / 1024 ** 2:.1f} MiB "
+              f"(limit {cache.max_bytes / 1024 ** 2:.0f} MiB)")
+    else:
+        for namespace in (args.namespace,) + DERIVED_NAMESPACES.get(args.namespace, ()):
+            cache = LocalCache(namespace)
+            removed = cache.invalidate(args.keys)
+            print(f"[INFO] Removed {removed} entries from {cache.root}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
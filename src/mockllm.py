@@ -0,0 +1,106 @@
+"""
+Deterministic stand-in for an OpenAI-compatible inference server, to run
+evaluate.py offline and measure its throughput.
+The reply to a prompt is a hash of it: one of the listed option letters for
+MCQs, Yes or No otherwise. --latency (per request) and --per-prompt (per
+prompt of a batch) simulate model time, --slots caps the requests served at
+once, and --fail-every returns HTTP 503 for every n-th request so retries can
+be exercised. GET /stats reports request counts.
+"""
+import argparse
+import asyncio
+import hashlib
+import re
+import sys
+import time
+
+from evaluate import _aiohttp
+
+OPTION = re.compile(r"^([A-Z])\.", re.MULTILINE)
+
+def _web():
+    _aiohttp()
+    import aiohttp.web
+    return aiohttp.web
+
+def reply(prompt, seed=0):
+    h = int.from_bytes(hashlib.sha256(f"{seed}:{prompt}".encode("utf-8")).digest()[:8], "big")
+    letters = OPTION.findall(prompt)
+    if letters:
+        return letters[h % len(letters)]
+    return ("Yes", "No")[h % 2]
+
+def make_app(latency=0.0, per_prompt=0.0, slots=64, fail_every=0, seed=0):
+    web = _web()
+    stats = {"requests": 0, "prompts": 0, "failed": 0, "in_flight": 0, "max_in_flight": 0}
+    gate = asyncio.Semaphore(slots)
+
+    async def serve(prompts):
+        # Model time for one request, or False when it is made to fail
+        stats["requests"] += 1
+        if fail_every and stats["requests"] % fail_every == 0:
+            stats["failed"] += 1
+            return False
+        async with gate:
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+            await asyncio.sleep(latency + per_prompt * len(prompts))
+            stats["in_flight"] -= 1
+        stats["prompts"] += len(prompts)
+        return True
+
+    def unavailable():
+        return web.json_response({"error": {"message": "overloaded"}}, status=503,
+                                 headers={"Retry-After": "0.1"})
+
+    async def completions(request):
+        body = await request.json()
+        prompts = body["prompt"] if isinstance(body["prompt"], list) else [body["prompt"]]
+        if not await serve(prompts):
+            return unavailable()
+        return web.json_response({
+            "object": "text_completion", "created": int(time.time()), "model": body.get("model"),
+            "choices": [{"index": k, "text": reply(p, seed), "finish_reason": "stop", "logprobs": None}
+                        for k, p in enumerate(prompts)]})
+
+    async def chat(request):
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        if not await serve([prompt]):
+            return unavailable()
+        return web.json_response({
+            "object": "chat.completion", "created": int(time.time()), "model": body.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": reply(prompt, seed)}}]})
+
+    async def models(request):
+        return web.json_response({"object": "list", "data": [{"id": "mock", "object": "model"}]})
+
+    async def get_stats(request):
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.add_routes([web.post("/v1/completions", completions),
+                    web.post("/v1/chat/completions", chat),
+                    web.get("/v1/models", models),
+                    web.get("/stats", get_stats)])
+    return app
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deterministic mock OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per request")
+    parser.add_argument("--per-prompt", type=float, default=0.002, help="extra seconds per prompt")
+    parser.add_argument("--slots", type=int, default=64, help="requests served concurrently")
+    parser.add_argument("--fail-every", type=int, default=0, help="503 for every n-th request")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    app = make_app(args.latency, args.per_prompt, args.slots, args.fail_every, args.seed)
+    print(f"[INFO] Mock model server on http://{args.host}:{args.port}/v1")
+    _web().run_app(app, host=args.host, port=args.port, print=None)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
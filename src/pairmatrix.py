@@ -0,0 +1,95 @@
+# Dense N x N views of the pairwise relation tables. Next to dir.csv and
+# dis.csv the extraction saves an entity table (id, place) and, per family, a
+# float32 value matrix (bearing / distance_m) and an int8 token matrix (index
+# into FAMILIES[family]["tokens"]) as .npy files. matrix[i, j] describes the
+# row (place1 = i, place2 = j); NaN / -1 where the table has no such row.
+# Loading maps the files read-only, so processes share one page-cached copy.
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from conceptspecs import FAMILIES
+from tables import read_table, table_path, write_table
+
+REL_DIR = os.path.join("..", "geodata", "relations")
+ENTITIES = "entities.csv"
+VALUES = {"dir": "bearing", "dis": "distance_m"}
+# dis.csv holds each unordered pair once
+SYMMETRIC = {"dir": False, "dis": True}
+
+def matrix_path(rel_dir, family, kind):
+    return os.path.join(rel_dir, f"{family}_{kind}.npy")
+
+def _tmp(path):
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def _save_array(path, array):
+    # Published with os.replace: open memory maps keep the previous file
+    tmp = _tmp(path)
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+def save_entities(rel_dir, names):
+    # Ids are positions in the sorted distinct names. The extractors load the
+    # same wards, so concurrent stages publish identical tables.
+    places = np.unique(np.asarray(names, dtype=str))
+    path = os.path.join(rel_dir, ENTITIES)
+    tmp = write_table(pd.DataFrame({"id": np.arange(len(places)), "place": places}),
+                      _tmp(os.path.splitext(path)[0]) + ".csv")
+    os.replace(tmp, table_path(path))
+    return places
+
+def save_pair_matrices(rel_dir, family, names, df):
+    # Entity table for `names` (all extracted places) plus the family's
+    # matrices filled from its final pair table `df`
+    places = save_entities(rel_dir, names)
+    index = pd.Index(places)
+    i = index.get_indexer(df["place1"].astype(str))
+    j = index.get_indexer(df["place2"].astype(str))
+    if (i < 0).any() or (j < 0).any():
+        raise ValueError(f"{family} rows name places that were not extracted")
+    values = np.full((len(places), len(places)), np.nan, dtype=np.float32)
+    codes = np.full((len(places), len(places)), -1, dtype=np.int8)
+    v = df[VALUES[family]].to_numpy(np.float32)
+    c = pd.Categorical(df["relation"], categories=FAMILIES[family]["tokens"]).codes
+    values[i, j], codes[i, j] = v, c
+    if SYMMETRIC[family]:
+        values[j, i], codes[j, i] = v, c
+    _save_array(matrix_path(rel_dir, family, VALUES[family]), values)
+    _save_array(matrix_path(rel_dir, family, "relation"), codes)
+
+class PairMatrices:
+    def __init__(self, places, values, codes):
+        self.places = places
+        self.place_ids = {p: k for k, p in enumerate(places)}
+        self.values, self.codes = values, codes
+
+    @classmethod
+    def load(cls, rel_dir=REL_DIR, families=tuple(VALUES), mmap_mode="r"):
+        entities = read_table(os.path.join(rel_dir, ENTITIES), keep_default_na=False)
+        places = entities["place"].astype(str).to_numpy()
+        values, codes = {}, {}
+        for f in families:
+            values[f] = np.load(matrix_path(rel_dir, f, VALUES[f]), mmap_mode=mmap_mode)
+            codes[f] = np.load(matrix_path(rel_dir, f, "relation"), mmap_mode=mmap_mode)
+            if values[f].shape != (len(places),) * 2 or codes[f].shape != values[f].shape:
+                raise ValueError(f"{f} matrices do not match {ENTITIES} in {rel_dir}; "
+                                 "re-run the extraction")
+        return cls(places, values, codes)
+
+    def value(self, family, place1, place2):
+        return float(self.values[family][self.place_ids[place1], self.place_ids[place2]])
+
+    def within(self, place, metres):
+        # Places at most `metres` from `place`; pairs beyond the extracted
+        # distance band (DISTANCE_MAX_BAND) are NaN and never match
+        row = self.values["dis"][self.place_ids[place]]
+        return self.places[np.flatnonzero(row <= metres)]
+
+    def related(self, family, token, place):
+        # Places x with a (x, token, place) row, e.g. every place north of `place`
+        code = FAMILIES[family]["tokens"].index(token)
+        return self.places[np.flatnonzero(self.codes[family][:, self.place_ids[place]] == code)]
\ No newline at end of file
@@ -0,0 +1,28 @@
+# Shared place-name normalization for YAGO2geo entity URIs
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+_PREFIX = re.compile(r'^(geoentity_|osentity_)')
+_ID_SUFFIX = re.compile(r'_[0-9]+$')
+_SEPARATORS = re.compile(r'[_\,]')
+_WARD_SUFFIX = re.compile(r'\bWard$')
+_SPACES = re.compile(r'\s+')
+
+@lru_cache(maxsize=None)
+def clean_uri(uri):
+    name = uri.rsplit("/", 1)[-1]
+    name = _PREFIX.sub('', name)
+    name = _ID_SUFFIX.sub('', name)
+    name = _SEPARATORS.sub(' ', name)
+    name = _WARD_SUFFIX.sub('', name)
+    return _SPACES.sub(' ', name).strip()
+
+def clean_uris(uris):
+    # Clean each distinct URI once and map back as a Categorical; distinct
+    # URIs that normalize to the same name share one category
+    codes, uniques = pd.factorize(np.asarray(uris, dtype=object))
+    name_codes, names = pd.factorize(np.array([clean_uri(u) for u in uniques], dtype=object))
+    return pd.Categorical.from_codes(name_codes[codes], categories=names)
\ No newline at end of file
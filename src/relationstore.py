@@ -0,0 +1,124 @@
+# Integer-coded in-memory view of the relation CSVs for the concept generators.
+# Places and tokens are interned once; each relation family gets CSR adjacency
+# keyed on (token, place1) and (token, place2), so lookups cost O(degree)
+# instead of a DataFrame mask over every row.
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+
+from tables import read_table
+
+REL_DIR = os.path.join("..", "geodata", "relations")
+FILES = {"dir": "dir.csv", "dis": "dis.csv", "top": "top.csv"}
+
+def _csr(keys, n_keys):
+    # Row ids grouped by key; the stable sort keeps file order inside a group
+    order = np.argsort(keys, kind="stable")
+    indptr = np.zeros(n_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n_keys), out=indptr[1:])
+    return indptr, order
+
+def partial_matches(matches, min_count, exclude=None):
+    # Ids occurring at least `min_count` times across the `matches` id arrays
+    # (ignoring `exclude`), in order of first occurrence
+    ids = np.concatenate(matches)
+    if exclude is not None:
+        ids = ids[ids != exclude]
+    uniq, first, counts = np.unique(ids, return_index=True, return_counts=True)
+    keep = counts >= min_count
+    return uniq[keep][np.argsort(first[keep], kind="stable")]
+
+class Relation:
+    # One relation family, e.g. all "dis" rows, with place and token ids
+    def __init__(self, df, tokens, place_index):
+        self.names = place_index.to_numpy()
+        self.tokens = list(tokens)
+        self.token_ids = {t: i for i, t in enumerate(self.tokens)}
+        self.place1 = place_index.get_indexer(df["place1"])
+        self.place2 = place_index.get_indexer(df["place2"])
+        self.token = pd.Index(self.tokens).get_indexer(df["relation"])
+        n = self.n_places = len(place_index)
+        n_keys = len(self.tokens) * n
+        self.forward = _csr(self.token * n + self.place1, n_keys)
+        self.backward = _csr(self.token * n + self.place2, n_keys)
+
+    def __len__(self):
+        return len(self.token)
+
+    def _lookup(self, csr, place, tokens):
+        indptr, order = csr
+        if isinstance(tokens, str):
+            k = self.token_ids[tokens] * self.n_places + place
+            return order[indptr[k]:indptr[k + 1]]
+        rows = [self._lookup(csr, place, t) for t in tokens]
+        return np.sort(np.concatenate(rows)) if rows else order[:0]
+
+    def rows(self, place, tokens):
+        # Rows with this place1 and one of `tokens` (a token or a list), in file order
+        return self._lookup(self.forward, place, tokens)
+
+    def neighbors(self, place, token):
+        # place2 ids related to `place` by `token`
+        return self.place2[self.rows(place, token)]
+
+    def reverse(self, place2, token):
+        # place1 ids with `token` towards `place2`
+        return self.place1[self._lookup(self.backward, place2, token)]
+
+    def presence(self):
+        # Bitset per token: presence()[t, p] is True when place p has a token-t row
+        indptr, _ = self.forward
+        return (np.diff(indptr) > 0).reshape(len(self.tokens), self.n_places)
+
+    def edge(self, row):
+        # (token, place2 name) of a row
+        return self.tokens[self.token[row]], self.names[self.place2[row]]
+
+class RelationStore:
+    # families: {"dir": (frame, tokens), ...}; only rows with one of the
+    # family's tokens are kept, and `places` lists every place they mention
+    def __init__(self, families):
+        frames = {f: df[df["relation"].isin(tokens)] for f, (df, tokens) in families.items()}
+        self.places = sorted(set(pd.concat(
+            [df[c] for df in frames.values() for c in ("place1", "place2")]).unique()))
+        index = pd.Index(self.places, dtype=object)
+        self.place_ids = {p: i for i, p in enumerate(self.places)}
+        self.relations = {f: Relation(frames[f], tokens, index)
+                          for f, (_, tokens) in families.items()}
+
+    @classmethod
+    def load(cls, rel_dir=REL_DIR, **tokens):
+        # RelationStore.load(dis=DIS_TOKENS, dir=DIR_TOKENS) reads each CSV once
+        return cls({f: (read_table(os.path.join(rel_dir, FILES[f])), t)
+                    for f, t in tokens.items()})
+
+    def __getitem__(self, family):
+        return self.relations[family]
+
+    def combos(self, order, families):
+        # {(token, ...): place ids} for every combination taking one token per
+        # (family, tokens) entry, restricted to places having all of them.
+        # Place lists follow `order` and combinations are keyed in the order a
+        # sequential scan of `order` meets them first.
+        order = np.asarray(order, dtype=np.int64)
+        present = [self[f].presence()[:, order] for f, _ in families]
+        token_rows = [[self[f].token_ids[t] for t in tokens] for f, tokens in families]
+        found = []
+        for rank, combo in enumerate(itertools.product(*token_rows)):
+            mask = np.logical_and.reduce([m[t] for m, t in zip(present, combo)])
+            if mask.any():
+                tokens = tuple(self[f].tokens[t] for (f, _), t in zip(families, combo))
+                found.append((int(np.argmax(mask)), rank, tokens, order[mask]))
+        found.sort(key=lambda c: c[:2])
+        return {tokens: hits for _, _, tokens, hits in found}
+
+    def places_of(self, families):
+        # Sorted names of every place mentioned by the given families
+        ids = np.unique(np.concatenate(
+            [np.concatenate([self[f].place1, self[f].place2]) for f in families]))
+        return self.names(ids)
+
+    def names(self, ids):
+        return [self.places[i] for i in ids]
\ No newline at end of file
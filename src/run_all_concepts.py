@@ -1,25 +1,98 @@
-# Run All Geobenchmark Dataset Generators
-import subprocess, os
-scripts = ["atomicconcept.py", "dir_top.py", "dis_dir.py", "top_dis.py", "3concepts.py"]
-
-SRC_DIR = os.path.join(os.path.dirname(__file__))
-def run_script(script):
-    script_path = os.path.join(SRC_DIR, script)
-    if not os.path.exists(script_path):
-        print(f"[WARN] Skipping {script} — file not found.")
-        return
-    print(f"\n[INFO] Running {script} ")
+"""
+Run All Geobenchmark Dataset Generators in one process.
+The relation tables are read and validated once; every stage gets them as
+frames (atomic) or as the shared RelationStore (compositional subsets).
+"""
+import argparse
+import os
+import sys
+import time
+
+import atomicconcept
+import compositional
+from conceptspecs import FAMILIES, SPECS
+from relationstore import FILES
+from tables import find_table, read_table
+
+REL_DIR = compositional.REL_DIR
+BASE_DIR = compositional.BASE_DIR
+REQUIRED_COLUMNS = ["place1", "place2", "relation"]
+STAGES = ["atomic", "dir_top", "dis_dir", "top_dis", "3_concept"]
+
+def load_relations(rel_dir=REL_DIR):
+    # {"dir": df, "dis": df, "top": df}; raises ValueError on unusable tables
+    frames = {}
+    for family, name in FILES.items():
+        path = find_table(os.path.join(rel_dir, name))
+        if path is None:
+            raise FileNotFoundError(f"No {name} (or Parquet equivalent) in {rel_dir}")
+        df = read_table(path)
+        missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+        if missing:
+            raise ValueError(f"{path}: missing column(s) {', '.join(missing)}")
+        if df[REQUIRED_COLUMNS].isna().any().any():
+            raise ValueError(f"{path}: empty place or relation values")
+        if not df["relation"].isin(FAMILIES[family]["tokens"]).any():
+            raise ValueError(f"{path}: no {family} relation tokens")
+        frames[family] = df
+    return frames
+
+def run_stage(name, frames, store, seed, base_dir, pool):
+    if name == "atomic":
+        atomicconcept.write(atomicconcept.generate(frames, seed), base_dir)
+    else:
+        compositional.write(name, compositional.generate(store, name, seed, pool), base_dir)
+
+def run(stages=STAGES, rel_dir=REL_DIR, base_dir=BASE_DIR, seed=compositional.SEED,
+        workers=compositional.WORKERS):
+    # Returns ({stage: seconds}, [failed stages]); a failed stage does not stop the others
+    start = time.perf_counter()
+    frames = load_relations(rel_dir)
+    store = compositional.build_store(frames) if set(stages) & set(SPECS) else None
+    timings = {"load": time.perf_counter() - start}
+    print(f"[INFO] Loaded relation tables ({timings['load']:.1f}s)")
+
+    failed = []
+    pool = compositional.open_pool(store, workers) if store is not None else None
     try:
-        subprocess.run(["python3", script_path], check=True)
-        print(f"[DONE] {script} completed successfully.\n")
-    except subprocess.CalledProcessError:
-        print(f"[ERROR] {script} failed.\n")
+        for name in stages:
+            start = time.perf_counter()
+            try:
+                run_stage(name, frames, store, seed, base_dir, pool)
+            except Exception as e:
+                print(f"[ERROR] {name} failed: {e}", file=sys.stderr)
+                failed.append(name)
+                continue
+            timings[name] = time.perf_counter() - start
+            print(f"[DONE] {name} ({timings[name]:.1f}s)")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return timings, failed
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate every GeoBenchmark subset")
+    parser.add_argument("--only", nargs="+", choices=STAGES, help="run just these stages")
+    parser.add_argument("--skip", nargs="+", choices=STAGES, default=[], help="stages to leave out")
+    parser.add_argument("--relations-dir", default=REL_DIR)
+    parser.add_argument("--output-dir", default=BASE_DIR)
+    parser.add_argument("--seed", type=int, default=compositional.SEED)
+    parser.add_argument("--workers", type=int, default=compositional.WORKERS)
+    args = parser.parse_args(argv)
+
+    stages = [s for s in STAGES if (not args.only or s in args.only) and s not in args.skip]
     print(" GeoBenchmark Dataset Generation")
-    for script in scripts:
-        run_script(script)
+    start = time.perf_counter()
+    try:
+        _, failed = run(stages, args.relations_dir, args.output_dir, args.seed, args.workers)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    print(f"[INFO] Generation wall time {time.perf_counter() - start:.1f}s")
+    if failed:
+        return 1
     print(" All Generators Completed ")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
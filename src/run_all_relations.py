@@ -1,12 +1,57 @@
 """
-Execute all three extraction scripts sequentially.
+Run the three relation extractions concurrently in one process.
 Assumes GraphDB is already running and accessible at GRAPHDB_ENDPOINT.
+The stages share one pooled keep-alive HTTP session to the endpoint.
 """
-import subprocess
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-scripts = ["src/distoken.py", "src/dirtoken.py", "src/topotoken.py"]
+import dirtoken
+import distoken
+import toptoken
+from extraction import GRAPHDB_ENDPOINT, MAX_CONNECTIONS, SparqlClient
+from incremental import FORCE_FULL
+from tables import table_path
 
-for script in scripts:
-    print(f"[INFO] Running {script}")
-    subprocess.run(["python3", script], check=True)
-print("[INFO] All extractions completed.")
\ No newline at end of file
+STAGES = {"distance": distoken, "direction": dirtoken, "topology": toptoken}
+
+def run_stage(name, module, client, full):
+    start = time.perf_counter()
+    rows = module.run(client, full=full)
+    elapsed = time.perf_counter() - start
+    print(f"[DONE] {name}: {rows} rows -> {table_path(module.OUTPUT_PATH)} ({elapsed:.1f}s)")
+    return elapsed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract all spatial relations")
+    parser.add_argument("--endpoint", default=GRAPHDB_ENDPOINT)
+    parser.add_argument("--max-connections", type=int, default=MAX_CONNECTIONS,
+                        help="concurrent requests to the endpoint")
+    parser.add_argument("--full", action="store_true", default=FORCE_FULL,
+                        help="recompute every pair instead of only changed entities")
+    args = parser.parse_args(argv)
+
+    client = SparqlClient(args.endpoint, args.max_connections)
+    start = time.perf_counter()
+    failed = []
+    with ThreadPoolExecutor(max_workers=len(STAGES)) as pool:
+        futures = {name: pool.submit(run_stage, name, module, client, args.full)
+                   for name, module in STAGES.items()}
+        for name, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                print(f"[ERROR] {name} failed: {e}", file=sys.stderr)
+                failed.append(name)
+    client.close()
+
+    print(f"[INFO] Extraction wall time {time.perf_counter() - start:.1f}s")
+    if failed:
+        return 1
+    print("[INFO] All extractions completed.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,41 @@
+# Shared distractor sampling for the MCQ generators
+import random
+
+class DistractorSampler:
+    # Holds the place list once, with an id lookup, so each draw is O(1)
+    # instead of rebuilding [p for p in all_places if p != correct]
+    def __init__(self, places, rng=None):
+        self.places = list(places)
+        self.ids = {p: i for i, p in enumerate(self.places)}
+        self.rng = rng or random
+
+    def draw(self, correct, rng=None):
+        # Index-shift sampling: same draw (and RNG consumption) as
+        # rng.choice([p for p in places if p != correct]). `rng` overrides
+        # the sampler's stream, e.g. with a per-subject one.
+        rng = rng or self.rng
+        idx = self.ids.get(correct)
+        if idx is None:
+            return self.places[rng.randrange(len(self.places))]
+        k = rng.randrange(len(self.places) - 1)
+        return self.places[k + (k >= idx)]
+
+    def sample(self, k, exclude=(), rng=None):
+        # k distinct places outside `exclude` (e.g. the correct answer and
+        # the other options of a 4- or 5-option MCQ). Rejection sampling is
+        # O(k) expected while the exclusions are a small part of the list.
+        rng = rng or self.rng
+        seen = {self.ids[p] for p in exclude if p in self.ids}
+        available = len(self.places) - len(seen)
+        if k > available:
+            raise ValueError(f"Cannot draw {k} distractors from {available} places")
+        if 2 * (k + len(seen)) > len(self.places):
+            pool = [p for i, p in enumerate(self.places) if i not in seen]
+            return rng.sample(pool, k)
+        chosen = []
+        while len(chosen) < k:
+            i = rng.randrange(len(self.places))
+            if i not in seen:
+                seen.add(i)
+                chosen.append(self.places[i])
+        return chosen
\ No newline at end of file
@@ -0,0 +1,112 @@
+# Relation and result tables on disk. CSV is the default and release format;
+# with GEOBENCH_TABLE_FORMAT=parquet tables are written as Parquet, where the
+# repeated string columns are dictionary-encoded (read back as categoricals)
+# and distance_m / bearing are float32. Tables are named by their .csv path;
+# readers open whichever format exists, the most recently written first.
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+TABLE_FORMAT = os.getenv("GEOBENCH_TABLE_FORMAT", "csv")
+FORMATS = {"csv": ".csv", "parquet": ".parquet"}
+CATEGORICAL_COLUMNS = ["place1", "place2", "relation", "transition", "option_sources"]
+FLOAT32_COLUMNS = ["distance_m", "bearing"]
+
+def table_path(path, fmt=TABLE_FORMAT):
+    return os.path.splitext(path)[0] + FORMATS[fmt]
+
+def find_table(path):
+    # Existing file for the table named by `path`, or None
+    found = [table_path(path, fmt) for fmt in FORMATS if os.path.exists(table_path(path, fmt))]
+    return max(found, key=os.path.getmtime) if found else None
+
+def to_columnar(df):
+    return df.astype({
+        **{c: "category" for c in CATEGORICAL_COLUMNS if c in df.columns},
+        **{c: np.float32 for c in FLOAT32_COLUMNS if c in df.columns}})
+
+def _arrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet tables need pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+def read_table(path, **csv_kwargs):
+    # `csv_kwargs` only apply when the table is read from CSV
+    found = find_table(path) or path
+    if found.endswith(FORMATS["parquet"]):
+        _arrow()
+        return pd.read_parquet(found)
+    return pd.read_csv(found, **csv_kwargs)
+
+def iter_table(path, chunk_size, **csv_kwargs):
+    # The table as DataFrames of up to `chunk_size` rows, read incrementally
+    found = find_table(path) or path
+    if found.endswith(FORMATS["parquet"]):
+        pa = _arrow()
+        for batch in pa.parquet.ParquetFile(found).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        with pd.read_csv(found, chunksize=chunk_size, **csv_kwargs) as reader:
+            yield from reader
+
+def write_table(df, path, fmt=TABLE_FORMAT):
+    out = table_path(path, fmt)
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    if fmt == "parquet":
+        _arrow()
+        to_columnar(df).to_parquet(out, index=False)
+    else:
+        df.to_csv(out, index=False, encoding="utf-8")
+    return out
+
+class ParquetTableWriter:
+    # Appends DataFrame chunks as row groups; the first chunk fixes the schema
+    def __init__(self, path):
+        self.pa = _arrow()
+        self.path, self.writer, self.schema = path, None, None
+
+    def write(self, df):
+        pa = self.pa
+        table = pa.Table.from_pandas(to_columnar(df), preserve_index=False)
+        if self.writer is None:
+            # int32 dictionary indices, so later chunks with more categories fit
+            self.schema = pa.schema(
+                [pa.field(f.name, pa.dictionary(pa.int32(), f.type.value_type))
+                 if pa.types.is_dictionary(f.type) else f for f in table.schema],
+                metadata=table.schema.metadata)
+            self.writer = pa.parquet.ParquetWriter(self.path, self.schema)
+        self.writer.write_table(table.cast(self.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert GeoBenchmark tables between CSV and Parquet")
+    parser.add_argument("format", choices=list(FORMATS), help="format to write, e.g. csv for a release")
+    parser.add_argument("paths", nargs="+", help="tables or directories of tables")
+    args = parser.parse_args(argv)
+
+    names = set()
+    for path in args.paths:
+        if os.path.isdir(path):
+            for dirpath, _, files in os.walk(path):
+                names |= {os.path.join(dirpath, os.path.splitext(f)[0] + ".csv")
+                          for f in files if os.path.splitext(f)[1] in FORMATS.values()}
+        else:
+            names.add(table_path(path, "csv"))
+    for name in sorted(names):
+        if find_table(name) == table_path(name, args.format):
+            continue
+        out = write_table(read_table(name), name, args.format)
+        print(f"[INFO] Wrote {out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -1,18 +1,25 @@
 # Extract topological spatial relations (borders, within) using a GeoSPARQL endpoint.
 
-from SPARQLWrapper import SPARQLWrapper, JSON
-import urllib.request
+import numpy as np
 import pandas as pd
-import re
+import shapely
 import os
 import sys
 
-GRAPHDB_ENDPOINT = os.getenv("GRAPHDB_ENDPOINT", "http://localhost:X/repositories/yago")
+from extraction import GRAPHDB_ENDPOINT, SparqlClient, iter_select
+from geometry import load_geometries
+from incremental import FORCE_FULL, discard_manifest, geometry_hashes, plan
+from localcache import LocalCache
+from placenames import clean_uris
+from tables import write_table
+
 OUTPUT_PATH = "./results/relations/top.csv"
+# "local": fetch geometries and test predicates with an STRtree
+# "sparql": rely on the store's GeoSPARQL sfTouches / sfWithin
+TOPOLOGY_MODE = os.getenv("TOPOLOGY_MODE", "local")
 
-# Disable proxy interference
-proxy_support = urllib.request.ProxyHandler({})
-urllib.request.install_opener(urllib.request.build_opener(proxy_support))
+SF_TOUCHES = "http://www.opengis.net/ont/geosparql#sfTouches"
+SF_WITHIN = "http://www.opengis.net/ont/geosparql#sfWithin"
 
 queries = [
     # Touches (borders)
@@ -52,39 +59,97 @@ queries = [
     """
 ]
 
-rows = []
-sparql = SPARQLWrapper(GRAPHDB_ENDPOINT)
-sparql.setReturnFormat(JSON)
-for q in queries:
-    sparql.setQuery(q)
+# (class of ?ward2, predicate, apply the str(?ward1) < str(?ward2) filter)
+LOCAL_RELATIONS = [
+    ("OS_MetropolitanDistrictWard", "touches", False),
+    ("OS_EuropeanRegion", "within", True),
+    ("OS_MetropolitanDistrict", "within", True),
+]
+
+def predicate_pairs(geoms1, geoms2, predicate):
+    # Bulk STRtree query: (i, j) such that geoms1[i] <predicate> geoms2[j]
+    i, j = shapely.STRtree(geoms2).query(geoms1, predicate=predicate)
+    order = np.lexsort((j, i))
+    return i[order], j[order]
+
+def extract_local(client, full=FORCE_FULL):
+    # Only wards are tracked incrementally; any change to the region or
+    # district geometries changes the plan key and forces a full run
+    wards, ward_geoms = load_geometries(client, "OS_MetropolitanDistrictWard")
+    targets = {cls: load_geometries(client, cls) for cls, _, _ in LOCAL_RELATIONS
+               if cls != "OS_MetropolitanDistrictWard"}
+    targets_key = LocalCache.key(*(
+        h for places, geoms in targets.values()
+        for h in list(places) + geometry_hashes(geoms)))
+    names = clean_uris(wards)
+    delta = plan(OUTPUT_PATH, wards, names, ward_geoms,
+                 key={"mode": "local", "targets": targets_key}, full=full)
+
+    query = np.arange(len(wards)) if delta.full else np.flatnonzero(delta.affected)
+    frames, keys = [], []
+    for block, (cls, predicate, ordered) in enumerate(LOCAL_RELATIONS):
+        if cls == "OS_MetropolitanDistrictWard":
+            others, other_geoms, other_names = wards, ward_geoms, names
+        else:
+            others, other_geoms = targets[cls]
+            other_names = clean_uris(others)
+        qi, j = predicate_pairs(ward_geoms[query], other_geoms, predicate)
+        i = query[qi]
+        if cls == "OS_MetropolitanDistrictWard" and not delta.full:
+            # touches is symmetric: also emit (other ward, changed ward)
+            pair_ids = np.unique(np.concatenate([i * len(wards) + j, j * len(wards) + i]))
+            i, j = pair_ids // len(wards), pair_ids % len(wards)
+        place1, place2 = wards[i], others[j]
+        keep = place1 != place2
+        if ordered:
+            keep &= place1.astype(str) < place2.astype(str)
+        frames.append(pd.DataFrame({
+            "place1": np.asarray(names[i[keep]], dtype=object),
+            "place2": np.asarray(other_names[j[keep]], dtype=object),
+            "relation": "borders" if predicate == "touches" else "within"
+        }))
+        # Relation block, then ward, then other entity, as in a full run.
+        # Targets are not tracked entities: their indices are stored negative
+        # (order kept) so the merge does not renumber them.
+        j = j if cls == "OS_MetropolitanDistrictWard" else j - len(others)
+        keys.append(np.c_[np.full(int(keep.sum()), block), i[keep], j[keep]])
+    df = pd.concat(frames, ignore_index=True)
+    return delta.merge(df, np.concatenate(keys), entity_cols=(1, 2)), delta
+
+def extract_sparql(client):
+    frames = [pd.DataFrame(columns=["place1", "place2", "relation"], dtype=str)]
+    for k, q in enumerate(queries):
+        for chunk in iter_select(client, q, ["ward1", "ward2", "predicate"], f"top_query_{k}"):
+            frames.append(chunk.set_axis(["place1", "place2", "relation"], axis=1))
+    df = pd.concat(frames, ignore_index=True)
+    df["place1"] = clean_uris(df["place1"])
+    df["place2"] = clean_uris(df["place2"])
+    df["relation"] = df["relation"].map({
+        SF_TOUCHES: "borders",
+        SF_WITHIN:  "within"
+    })
+    return df
+
+def run(client, full=FORCE_FULL, mode=TOPOLOGY_MODE):
+    # Extract and write OUTPUT_PATH; returns the number of rows written
+    if mode == "local":
+        df, delta = extract_local(client, full)
+        print(f"[INFO] {delta.summary()}")
+    else:
+        df, delta = extract_sparql(client), None
+        # The local mode's manifest would describe a table this run replaces
+        discard_manifest(OUTPUT_PATH)
+    write_table(df, OUTPUT_PATH)
+    if delta is not None:
+        delta.save()
+    return len(df)
+
+def main():
     try:
-        res = sparql.queryAndConvert()
+        run(SparqlClient(GRAPHDB_ENDPOINT))
     except Exception as e:
         print("[ERROR] SPARQL query failed:", e, file=sys.stderr)
         sys.exit(1)
 
-    for b in res["results"]["bindings"]:
-        rows.append({
-            "place1": b["ward1"]["value"],
-            "place2": b["ward2"]["value"],
-            "relation": b["predicate"]["value"]
-        })
-
-df = pd.DataFrame(rows)
-
-def clean_uri(uri):
-    name = uri.rsplit("/", 1)[-1]
-    name = re.sub(r'^(geoentity_|osentity_)', '', name)
-    name = re.sub(r'_[0-9]+$', '', name)
-    name = re.sub(r'[_\,]', ' ', name)
-    name = re.sub(r'\bWard$', '', name)
-    return re.sub(r'\s+', ' ', name).strip()
-
-df["place1"] = df["place1"].apply(clean_uri)
-df["place2"] = df["place2"].apply(clean_uri)
-df["relation"] = df["relation"].map({
-    "http://www.opengis.net/ont/geosparql#sfTouches": "borders",
-    "http://www.opengis.net/ont/geosparql#sfWithin":  "within"
-})
-os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-df.to_csv(OUTPUT_PATH, index=False, encoding="utf-8")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,75 @@
+# Chunked row writers for the benchmark generators. Rows are buffered up to
+# `chunk_size` and appended to the output, so memory stays bounded and the
+# first rows can be read while generation is still running.
+import os
+
+import pandas as pd
+
+from tables import TABLE_FORMAT, ParquetTableWriter, table_path
+
+CHUNK_SIZE = int(os.getenv("GENERATE_CHUNK_SIZE", "10000"))
+
+class ChunkedTableWriter:
+    # `path` names the table by its .csv path; the file is written in `fmt`.
+    # CSV output has the same bytes as one DataFrame.to_csv(path, index=False).
+    def __init__(self, path, columns, chunk_size=CHUNK_SIZE, fmt=TABLE_FORMAT):
+        self.path = table_path(path, fmt)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.columns, self.chunk_size = list(columns), chunk_size
+        self.rows, self.buffer = 0, []
+        if fmt == "parquet":
+            self.file, self.parquet = None, ParquetTableWriter(self.path)
+        else:
+            self.file, self.parquet = open(self.path, "w", newline="", encoding="utf-8"), None
+            pd.DataFrame(columns=self.columns).to_csv(self.file, index=False)
+
+    def _append(self, df):
+        if self.parquet is not None:
+            self.parquet.write(df)
+        else:
+            df.to_csv(self.file, header=False, index=False)
+            self.file.flush()
+        self.rows += len(df)
+
+    def write(self, row):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def write_frame(self, df):
+        # Append a whole DataFrame (already in `columns` order)
+        self.flush()
+        self._append(df[self.columns])
+
+    def flush(self):
+        if self.buffer:
+            self._append(pd.DataFrame(self.buffer, columns=self.columns))
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+        if self.parquet is not None:
+            if self.rows == 0:
+                self.parquet.write(pd.DataFrame({c: pd.Series(dtype=str) for c in self.columns}))
+            self.parquet.close()
+        else:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_rows(rows, outputs, chunk_size=CHUNK_SIZE, fmt=TABLE_FORMAT):
+    # rows: iterable of (kind, row); outputs: {kind: (path, columns)}.
+    # Returns the number of rows written per kind.
+    writers = {kind: ChunkedTableWriter(path, columns, chunk_size, fmt)
+               for kind, (path, columns) in outputs.items()}
+    try:
+        for kind, row in rows:
+            writers[kind].write(row)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return {kind: writer.rows for kind, writer in writers.items()}
\ No newline at end of file
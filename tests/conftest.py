@@ -0,0 +1,5 @@
+# The pipeline modules are scripts run from src/; import them the same way
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
\ No newline at end of file
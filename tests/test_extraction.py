@@ -0,0 +1,35 @@
+import contextlib
+import io
+import re
+
+import extraction
+
+
+class PagingClient:
+    # Serves `rows` for LIMIT/OFFSET pages and records the queries it saw
+    endpoint = "http://example.org/sparql"
+
+    def __init__(self, rows):
+        self.rows, self.queries = rows, []
+
+    @contextlib.contextmanager
+    def select_csv(self, query):
+        self.queries.append(query)
+        limit = int(re.search(r"LIMIT (\d+)", query).group(1))
+        offset = int(re.search(r"OFFSET (\d+)", query).group(1))
+        lines = ["place,wkt"] + [f'{p},"{w}"' for p, w in self.rows[offset:offset + limit]]
+        yield io.BytesIO("\r\n".join(lines).encode("utf-8"))
+
+
+def test_pages_are_ordered_by_the_key_columns_only(tmp_path, monkeypatch):
+    monkeypatch.setattr(extraction, "STAGING_DIR", str(tmp_path))
+    rows = [(f"http://example.org/p{i}", f"POINT ({i} {i})") for i in range(5)]
+    client = PagingClient(rows)
+
+    path = extraction.paged_select(client, "SELECT ?place ?wkt WHERE {}", ["place", "wkt"],
+                                   "places", page_size=2, order_by=["place"])
+
+    assert len(client.queries) == 3
+    assert all("ORDER BY ?place\n" in q for q in client.queries)
+    with open(path, encoding="utf-8") as f:
+        assert f.read().splitlines()[1:] == [f'{p},{w}' for p, w in rows]
\ No newline at end of file
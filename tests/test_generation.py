@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+import bench
+import compositional
+from sampling import DistractorSampler
+
+PLACES = [f"Ward_{i}" for i in range(40)]
+
+
+@pytest.mark.parametrize("correct", ["Ward_0", "Ward_17", "Ward_39", "Elsewhere"])
+def test_draw_matches_the_list_rebuilding_sampler(correct):
+    sampler = DistractorSampler(PLACES)
+    rng, old_rng = random.Random(7), random.Random(7)
+    for _ in range(200):
+        assert sampler.draw(correct, rng) == old_rng.choice([p for p in PLACES if p != correct])
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    rel_dir = str(tmp_path_factory.mktemp("relations"))
+    bench.synth_relations(0.05, 8, 0, rel_dir)
+    return compositional.load_store(list(compositional.SPECS), rel_dir)
+
+
+@pytest.mark.parametrize("name", list(compositional.SPECS))
+def test_output_does_not_depend_on_workers(store, name, monkeypatch):
+    monkeypatch.setattr(compositional, "SHARD_SIZE", 4)
+    serial = list(compositional.generate(store, name, seed=3))
+    pool = compositional.open_pool(store, 4)
+    try:
+        pooled = list(compositional.generate(store, name, seed=3, pool=pool))
+    finally:
+        pool.shutdown()
+    assert serial and pooled == serial
\ No newline at end of file
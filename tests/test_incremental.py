@@ -0,0 +1,97 @@
+# Incremental extraction with wards that share a cleaned name: full runs keep
+# the pair-loop order, and incremental runs reproduce a full run's output
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+
+import dirtoken
+import distoken
+import toptoken
+from dirtoken import calculate_bearing
+from tables import read_table
+
+# Two "Abbey" wards (and two "Park" wards) that are not adjacent in URI order
+WARDS = {
+    "http://x/osentity_Abbey_1": (0.0, 53.0),
+    "http://x/osentity_Bank_2": (0.1, 53.0),
+    "http://x/osentity_Park_3": (0.0, 53.1),
+    "http://x/osentity_Abbey_4": (0.3, 53.2),
+    "http://x/osentity_Castle_5": (0.1, 53.1),
+    "http://x/osentity_Park_6": (0.6, 53.4),
+}
+CELL = 0.1
+TARGETS = {
+    "OS_MetropolitanDistrict": {"http://x/osentity_Borough_7": shapely.box(-0.05, 52.95, 0.25, 53.25)},
+    "OS_EuropeanRegion": {"http://x/osentity_North_8": shapely.box(-1, 52, 1, 54)},
+}
+
+def geometries(wards):
+    uris = np.array(sorted(wards), dtype=object)
+    return uris, np.array([shapely.box(x, y, x + CELL, y + CELL) for x, y in (wards[u] for u in uris)])
+
+def extract(module, tmp_path, wards, full):
+    # Runs `module` over `wards` into tmp_path and returns the table it wrote
+    def load_geometries(client, cls):
+        if cls == "OS_MetropolitanDistrictWard":
+            return geometries(wards)
+        uris = np.array(sorted(TARGETS[cls]), dtype=object)
+        return uris, np.array([TARGETS[cls][u] for u in uris])
+
+    out = os.path.join(str(tmp_path), "relations", os.path.basename(module.OUTPUT_PATH))
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(module, "OUTPUT_PATH", out)
+        mp.setattr(module, "load_geometries", load_geometries)
+        if module is toptoken:
+            module.run(None, full=full, mode="local")
+        else:
+            module.run(None, full=full)
+    return read_table(out, keep_default_na=False, float_precision="round_trip")
+
+def test_full_dir_run_keeps_pair_loop_order(tmp_path):
+    uris, geoms = geometries(WARDS)
+    names = [u.rsplit("_", 2)[-2] for u in uris]
+    c = shapely.centroid(geoms)
+    lat, lon = shapely.get_y(c), shapely.get_x(c)
+    expected = [(names[i], names[j], round(calculate_bearing(lat[j], lon[j], lat[i], lon[i]), 2))
+                for i in range(len(uris)) for j in range(len(uris)) if i != j]
+    df = extract(dirtoken, tmp_path, WARDS, full=True)
+    assert list(zip(df["place1"], df["place2"], df["bearing"])) == expected
+
+def test_full_dis_run_keeps_pair_loop_order(tmp_path):
+    uris, _ = geometries(WARDS)
+    names = [u.rsplit("_", 2)[-2] for u in uris]
+    df = extract(distoken, tmp_path, WARDS, full=True)
+    expected = [(names[i], names[j]) for i in range(len(uris)) for j in range(i + 1, len(uris))]
+    assert list(zip(df["place1"], df["place2"])) == expected
+
+@pytest.mark.parametrize("module", [dirtoken, distoken, toptoken])
+def test_incremental_run_matches_full_run(module, tmp_path):
+    before = dict(WARDS)
+    after = dict(WARDS)
+    after["http://x/osentity_Abbey_4"] = (0.2, 53.1)    # moved, shares its name
+    after["http://x/osentity_Abbey_9"] = (0.2, 53.0)    # new, shares its name
+    del after["http://x/osentity_Bank_2"]
+    extract(module, tmp_path / "inc", before, full=True)
+    incremental = extract(module, tmp_path / "inc", after, full=False)
+    full = extract(module, tmp_path / "full", after, full=True)
+    if module is distoken:
+        # The projection origin is kept from the first run; the closest
+        # points it finds may differ in the last digits
+        pd.testing.assert_frame_equal(incremental, full, check_exact=False, rtol=1e-9)
+    else:
+        pd.testing.assert_frame_equal(incremental, full)
+
+def test_incremental_run_keeps_unchanged_rows(tmp_path):
+    # Only the moved ward's pairs change; the others are reused as written
+    after = dict(WARDS)
+    after["http://x/osentity_Castle_5"] = (0.2, 53.3)
+    first = extract(dirtoken, tmp_path, WARDS, full=True)
+    second = extract(dirtoken, tmp_path, after, full=False)
+    unchanged = (first["place1"] != "Castle") & (first["place2"] != "Castle")
+    pd.testing.assert_frame_equal(first[unchanged].reset_index(drop=True),
+                                  second[(second["place1"] != "Castle") & (second["place2"] != "Castle")]
+                                  .reset_index(drop=True))
\ No newline at end of file
@@ -0,0 +1,20 @@
+import functools
+
+import localcache
+from localcache import LocalCache
+
+
+def test_invalidating_sparql_drops_derived_geometries(tmp_path, monkeypatch):
+    cache_at = functools.partial(LocalCache, root=str(tmp_path))
+    monkeypatch.setattr(localcache, "LocalCache", cache_at)
+    key, other = LocalCache.key("query"), LocalCache.key("other query")
+    for namespace, suffix in (("sparql", ".csv.gz"), ("geometries", ".npz")):
+        for k in (key, other):
+            cache_at(namespace).put(k, suffix, lambda tmp: open(tmp, "wb").close())
+
+    assert localcache.main(["invalidate", "sparql", key[:8]]) == 0
+
+    assert cache_at("sparql").get(key, ".csv.gz") is None
+    assert cache_at("geometries").get(key, ".npz") is None
+    assert cache_at("sparql").get(other, ".csv.gz") is not None
+    assert cache_at("geometries").get(other, ".npz") is not None
\ No newline at end of file